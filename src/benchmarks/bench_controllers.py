@@ -0,0 +1,146 @@
+import argparse
+import contextlib
+import json
+import os
+import random
+import sys
+import tracemalloc
+from time import perf_counter
+from timeit import repeat
+from typing import Dict, List
+
+from benchmarks.payloads import board_payload
+from game.logic.controllers import CONTROLLERS
+from game.metrics import percentile
+from game.parser import parse_board
+
+BASELINE = os.path.join(os.path.dirname(__file__), "controllers_baseline.json")
+
+SUITES = {
+    "small": dict(width=7, height=7, diamonds=5, bots=2, teleporters=1),
+    "tournament": dict(width=15, height=15, diamonds=20, bots=4, teleporters=1),
+    "large": dict(width=100, height=100, diamonds=500, bots=40, teleporters=5),
+}
+
+
+def payloads(suite: str, count: int) -> List[dict]:
+    # The measured bot, the first one, carries nothing: its controller has the
+    # whole inventory to plan for, as after every delivery in a game
+    boards = [board_payload(seed=seed, **SUITES[suite]) for seed in range(count)]
+    for payload in boards:
+        bot = next(game_object for game_object in payload["gameObjects"] if game_object["type"] == "BotGameObject")
+        bot["properties"]["diamonds"] = 0
+    return boards
+
+
+def calibrate() -> float:
+    # Time of a fixed workload, microseconds, stored with the baseline. A
+    # baseline saved on another machine is scaled by the ratio of the two.
+    boards = payloads("tournament", 50)
+    return min(repeat(lambda: [parse_board(payload) for payload in boards], number=5, repeat=5)) * 1e6
+
+
+def best_of(rounds: int, controller: str, payloads: List[dict], calls: int) -> Dict[str, float]:
+    # The round with the lowest p50, the others were slowed down by the machine
+    return min((measure(controller, payloads, calls) for _ in range(rounds)), key=lambda result: result["p50_us"])
+
+
+def measure(controller: str, payloads: List[dict], calls: int) -> Dict[str, float]:
+    # Every call gets a newly parsed board, like a live bot every tick, so
+    # nothing cached per board, by the board or by the controller, is reused
+    latencies = []
+    allocations = []
+    errors = 0
+    for seed, payload in enumerate(payloads):
+        random.seed(seed)
+        logic = CONTROLLERS[controller]()
+        for _ in range(calls):
+            board = parse_board(payload)
+            board_bot = board.bots[0]
+            start = perf_counter()
+            try:
+                logic.next_move(board_bot, board)
+            except Exception:
+                errors += 1
+            latencies.append(perf_counter() - start)
+
+        # Allocations are traced in a separate call, tracing skews the timing
+        board = parse_board(payload)
+        board_bot = board.bots[0]
+        tracemalloc.start()
+        tracemalloc.reset_peak()
+        try:
+            logic.next_move(board_bot, board)
+        except Exception:
+            pass
+        allocations.append(tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+
+    return {
+        "p50_us": percentile(latencies, 0.5) * 1e6,
+        "p99_us": percentile(latencies, 0.99) * 1e6,
+        "alloc_kib": sum(allocations) / len(allocations) / 1024,
+        "errors": errors,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark next_move of every controller")
+    parser.add_argument("--controllers", default=",".join(CONTROLLERS), action="store")
+    parser.add_argument("--suites", default=",".join(SUITES), action="store")
+    parser.add_argument("--boards", help="Boards per suite", default=20, type=int, action="store")
+    parser.add_argument("--calls", help="Calls per board", default=20, type=int, action="store")
+    parser.add_argument("--rounds", help="Measurements per suite, the fastest is kept", default=3, type=int, action="store")
+    parser.add_argument("--baseline", default=BASELINE, action="store")
+    parser.add_argument("--save-baseline", help="Store the results as the new baseline", action="store_true")
+    parser.add_argument(
+        "--threshold", help="Allowed slowdown against the baseline", default=0.2, type=float, action="store"
+    )
+    parser.add_argument(
+        "--min-delta-us", help="Ignore slowdowns smaller than this", default=5.0, type=float, action="store"
+    )
+    args = parser.parse_args()
+
+    baseline = {}
+    if os.path.exists(args.baseline) and not args.save_baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+    calibration = calibrate()
+    # Baseline times as they would be on this machine
+    scale = calibration / baseline["calibration_us"] if baseline.get("calibration_us") else 1.0
+    if baseline:
+        print("Machine speed against the baseline's: {:.2f}x".format(1 / scale))
+
+    results: Dict[str, Dict[str, Dict[str, float]]] = {}
+    regressions = []
+    print("{:<8} {:<11} {:>10} {:>10} {:>11} {:>7}".format("", "", "p50 us", "p99 us", "alloc KiB", "errors"))
+    for suite in args.suites.split(","):
+        suite_payloads = payloads(suite, args.boards)
+        for controller in args.controllers.split(","):
+            with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+                result = best_of(args.rounds, controller, suite_payloads, args.calls)
+            results.setdefault(controller, {})[suite] = result
+
+            line = "{:<8} {:<11} {:>10.1f} {:>10.1f} {:>11.1f} {:>7}".format(
+                controller, suite, result["p50_us"], result["p99_us"], result["alloc_kib"], result["errors"]
+            )
+            base = baseline.get("results", {}).get(controller, {}).get(suite)
+            if base:
+                expected = base["p50_us"] * scale
+                change = result["p50_us"] / expected - 1 if expected else 0.0
+                line += "  {:+.0%} p50 vs baseline".format(change)
+                if change > args.threshold and result["p50_us"] - expected > args.min_delta_us:
+                    regressions.append("{} {}".format(controller, suite))
+            print(line)
+
+    if args.save_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump({"calibration_us": calibration, "results": results}, f, indent=2)
+        print("Baseline saved to {}".format(args.baseline))
+    if regressions:
+        print("Regressions: {}".format(", ".join(regressions)))
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
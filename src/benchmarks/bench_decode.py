@@ -0,0 +1,60 @@
+import argparse
+import re
+from timeit import repeat
+
+from benchmarks.payloads import large_payloads, load_payloads
+from decode import decode
+
+
+# ==================== Reference ==================== #
+# decode as it was before the key cache, kept here to compare against
+def _snake_case(value):
+    first_underscore = re.sub("(.)([A-Z][a-z]+)", r"\1_\2", value)
+    return re.sub("([a-z0-9])([A-Z])", r"\1_\2", first_underscore).lower()
+
+
+def _reference_decode_keys(data):
+    formatted = {}
+    for key, value in {_snake_case(key): value for key, value in data.items()}.items():
+        if isinstance(value, dict):
+            formatted[key] = _reference_decode_keys(value)
+        elif isinstance(value, list) and len(value) > 0:
+            formatted[key] = [_reference_decode_keys(val) for val in value]
+        else:
+            formatted[key] = value
+    return formatted
+
+
+def reference_decode(data):
+    if isinstance(data, dict):
+        return _reference_decode_keys(data)
+    return [_reference_decode_keys(item) for item in data]
+
+
+# ==================== Benchmark ==================== #
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark decode against the reference decoder")
+    parser.add_argument("payloads", nargs="*", help="Recorded board responses (JSON files)")
+    parser.add_argument("--number", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    payloads = load_payloads(args.payloads) if args.payloads else large_payloads()
+    objects = sum(len(payload.get("gameObjects") or []) for payload in payloads)
+
+    for payload in payloads:
+        assert decode(payload) == reference_decode(payload)
+
+    print("{} boards, {} game objects".format(len(payloads), objects))
+    results = {}
+    for name, func in (("reference", reference_decode), ("decode", decode)):
+        best = min(
+            repeat(lambda: [func(p) for p in payloads], number=args.number, repeat=args.repeat)
+        ) / (args.number * len(payloads))
+        results[name] = best
+        print("{:>10}: {:8.3f} ms/board".format(name, best * 1000))
+    print("{:>10}: {:8.2f}x".format("speedup", results["reference"] / results["decode"]))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+import argparse
+import inspect
+import sys
+import tracemalloc
+import types
+from timeit import repeat
+from typing import Callable, Dict, List
+
+import game.models
+from benchmarks.payloads import board_payload, large_payloads
+from game.parser import compile_parser, parse_board
+
+
+def dict_models() -> types.ModuleType:
+    # The models as they are, except every class keeps an instance __dict__ and
+    # the parser builds a new Position for every object instead of interning
+    source = inspect.getsource(game.models).replace("slots=True, ", "").replace("(slots=True)", "")
+    module = types.ModuleType("benchmarks.dict_models")
+    sys.modules[module.__name__] = module
+    exec(compile(source, "<dict models>", "exec"), module.__dict__)
+    return module
+
+
+def retained(parse: Callable[[dict], object], payloads: List[dict]) -> int:
+    # Bytes held by the parsed boards, counted while they are alive
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    boards = [parse(payload) for payload in payloads]
+    size = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    del boards
+    return size
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark memory and construction time of the slotted models")
+    parser.add_argument("--number", type=int, default=5)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    parsers: Dict[str, Callable[[dict], object]] = {
+        "dict": compile_parser(dict_models().Board),
+        "slots": parse_board,
+    }
+    suites = {
+        "15x15": [board_payload(seed=i) for i in range(50)],
+        "100x100": large_payloads(),
+    }
+
+    print("{:<8} {:<6} {:>12} {:>14} {:>13}".format("", "", "boards/s", "KiB per board", "B per object"))
+    for suite, payloads in suites.items():
+        objects = sum(len(payload["gameObjects"]) for payload in payloads)
+        results = {}
+        for name, parse in parsers.items():
+            best = min(repeat(lambda: [parse(p) for p in payloads], number=args.number, repeat=args.repeat))
+            size = retained(parse, payloads)
+            results[name] = (args.number * len(payloads) / best, size)
+            print(
+                "{:<8} {:<6} {:>12.1f} {:>14.1f} {:>13.0f}".format(
+                    suite, name, results[name][0], size / len(payloads) / 1024, size / objects
+                )
+            )
+        print(
+            "{:<8} {:<6} {:>11.2f}x {:>13.2f}x".format(
+                suite, "gain", results["slots"][0] / results["dict"][0], results["dict"][1] / results["slots"][1]
+            )
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+import argparse
+from timeit import repeat
+
+from dacite import from_dict
+
+from benchmarks.payloads import board_payload, large_payloads, load_payloads
+from decode import decode
+from game.models import Board
+from game.parser import parse_board
+
+
+def reference_parse(payload: dict) -> Board:
+    return from_dict(Board, decode(payload))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark parse_board against decode + dacite")
+    parser.add_argument("payloads", nargs="*", help="Recorded board responses (JSON files)")
+    parser.add_argument("--number", type=int, default=5)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    if args.payloads:
+        suites = {"recorded": load_payloads(args.payloads)}
+    else:
+        suites = {
+            "15x15": [board_payload(seed=i) for i in range(50)],
+            "100x100": large_payloads(),
+        }
+
+    for suite, payloads in suites.items():
+        # tests/test_parser.py covers the edge cases, this checks the suite's own boards
+        for payload in payloads:
+            if parse_board(payload) != reference_parse(payload):
+                raise SystemExit("parse_board differs from decode + dacite on a {} board".format(suite))
+
+        results = {}
+        for name, func in (("dacite", reference_parse), ("parse_board", parse_board)):
+            best = min(
+                repeat(lambda: [func(p) for p in payloads], number=args.number, repeat=args.repeat)
+            )
+            results[name] = args.number * len(payloads) / best
+            print("{:>8} {:>12}: {:10.1f} boards/s".format(suite, name, results[name]))
+        print("{:>8} {:>12}: {:10.2f}x".format(suite, "speedup", results["parse_board"] / results["dacite"]))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+import json
+import random
+from typing import List
+
+
+def board_payload(
+    width: int = 15,
+    height: int = 15,
+    diamonds: int = 20,
+    bots: int = 4,
+    teleporters: int = 1,
+    seed: int = 0,
+) -> dict:
+    # Raw camelCase board as the game engine sends it, before decode
+    rng = random.Random(seed)
+    count = min(width * height, diamonds + bots * 2 + teleporters * 2 + 1)
+    cells = rng.sample([(x, y) for y in range(height) for x in range(width)], count)
+    objects = []
+
+    def add(type: str, properties: dict) -> dict:
+        x, y = cells.pop()
+        game_object = {
+            "id": len(objects) + 1,
+            "position": {"x": x, "y": y},
+            "type": type,
+            "properties": properties,
+        }
+        objects.append(game_object)
+        return game_object
+
+    for i in range(bots):
+        name = "bot{}".format(i)
+        base = add("BaseGameObject", {"name": name})
+        add(
+            "BotGameObject",
+            {
+                "diamonds": rng.randint(0, 5),
+                "score": rng.randint(0, 30),
+                "name": name,
+                "inventorySize": 5,
+                "canTackle": True,
+                "millisecondsLeft": rng.randint(1000, 60000),
+                "timeJoined": "2024-02-28T10:00:00.000Z",
+                "base": dict(base["position"]),
+            },
+        )
+    for i in range(teleporters):
+        pair_id = str(i + 1)
+        add("TeleportGameObject", {"pairId": pair_id})
+        add("TeleportGameObject", {"pairId": pair_id})
+    add("DiamondButtonGameObject", {})
+    for _ in range(diamonds):
+        add("DiamondGameObject", {"points": 2 if rng.random() < 0.2 else 1})
+
+    return {
+        "id": 1,
+        "width": width,
+        "height": height,
+        "minimumDelayBetweenMoves": 100,
+        "features": [
+            {
+                "name": "DiamondProvider",
+                "config": {
+                    "generationRatio": 0.1,
+                    "minRatioForGeneration": 0.01,
+                    "redRatio": 0.2,
+                },
+            },
+            {"name": "DiamondButtonProvider", "config": {}},
+            {"name": "TeleportProvider", "config": {"pairs": teleporters}},
+            {"name": "TeleportRelocationProvider", "config": {"seconds": 10}},
+            {"name": "BotProvider", "config": {"inventorySize": 5, "canTackle": True}},
+        ],
+        "gameObjects": objects,
+    }
+
+
+def large_payloads(count: int = 10, seed: int = 0) -> List[dict]:
+    return [
+        board_payload(100, 100, diamonds=500, bots=40, teleporters=5, seed=seed + i)
+        for i in range(count)
+    ]
+
+
+def load_payloads(paths: List[str]) -> List[dict]:
+    # Recorded responses, either a single board or a list of boards per file
+    payloads = []
+    for path in paths:
+        with open(path) as f:
+            data = json.load(f)
+        if isinstance(data, dict):
+            data = data.get("data", data)
+        payloads.extend(data if isinstance(data, list) else [data])
+    return payloads
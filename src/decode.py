@@ -1,10 +1,10 @@
 import re
 
-
-def _unpack(data):
-    if isinstance(data, dict):
-        return data.items()
-    return data
+# Responses keep repeating the same few camelCase keys, so their snake case
+# version is cached. The cache is cleared when it grows past its bound so a
+# misbehaving server cannot make it grow without limit.
+KEY_CACHE_SIZE = 1024
+_key_cache = {}
 
 
 def _snake_case(value):
@@ -17,31 +17,44 @@ def _snake_case(value):
     return re.sub("([a-z0-9])([A-Z])", r"\1_\2", first_underscore).lower()
 
 
-def _keys_to_snake_case(content):
-    """
-    Convert all keys for given dict to snake case
-    :param content: dict
-    :return: dict
-    """
-    return {_snake_case(key): value for key, value in content.items()}
+def _cached_snake_case(key):
+    value = _snake_case(key)
+    if len(_key_cache) >= KEY_CACHE_SIZE:
+        _key_cache.clear()
+    _key_cache[key] = value
+    return value
 
 
 def decode_keys(data):
     """
-    Convert all keys for given dict/list to snake case recursively
+    Convert all keys for given dict/list to snake case, walking nested values
+    with an explicit stack instead of recursion
     :param data: dict
     :return: dict
     """
+    cache = _key_cache
     formatted = {}
-    for key, value in _unpack(_keys_to_snake_case(data)):
-        if isinstance(value, dict):
-            formatted[key] = decode_keys(value)
-        elif isinstance(value, list) and len(value) > 0:
-            formatted[key] = []
-            for _, val in enumerate(value):
-                formatted[key].append(decode_keys(val))
-        else:
-            formatted[key] = value
+    stack = [(data, formatted)]
+    while stack:
+        source, target = stack.pop()
+        for key, value in source.items():
+            name = cache.get(key) or _cached_snake_case(key)
+            if type(value) is dict:
+                child = {}
+                stack.append((value, child))
+                target[name] = child
+            elif type(value) is list and value:
+                items = []
+                for item in value:
+                    if type(item) is dict:
+                        child = {}
+                        stack.append((item, child))
+                        items.append(child)
+                    else:
+                        items.append(item)
+                target[name] = items
+            else:
+                target[name] = value
     return formatted
 
 
@@ -49,7 +62,4 @@ def decode(data):
     if isinstance(data, dict):
         return decode_keys(data)
 
-    formatted = []
-    for item in data:
-        formatted.append(decode_keys(item))
-    return formatted
+    return [decode_keys(item) for item in data]
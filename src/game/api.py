@@ -1,44 +1,134 @@
 import json
-from dataclasses import dataclass
-from typing import List, Optional, Tuple, Union
+import threading
+from dataclasses import dataclass, field
+from time import perf_counter
+from typing import Dict, List, Optional, Tuple, Union
 
 import requests
-from colorama import Back, Fore, Style, init
-from dacite import from_dict
 from decode import decode
+from game.log import DEBUG, get_logger
+from game.metrics import Metrics
 from game.models import Board, Bot
+from game.parser import parse_board, parse_bot
 from requests import Response
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import ReadTimeoutError
+
+log = get_logger("api")
+
+
+@dataclass
+class LatencyStats:
+    count: int = 0
+    total: float = 0.0
+    min: float = float("inf")
+    max: float = 0.0
+
+    def add(self, seconds: float) -> None:
+        self.count += 1
+        self.total += seconds
+        self.min = min(self.min, seconds)
+        self.max = max(self.max, seconds)
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
 
 
 @dataclass
 class Api:
     url: str
+    pool_size: int = 4
+    # Seconds, None waits for the server as long as it takes
+    connect_timeout: Optional[float] = None
+    read_timeout: Optional[float] = None
+    metrics: Optional[Metrics] = None
+    latency: Dict[str, LatencyStats] = field(default_factory=dict, init=False)
+
+    def __post_init__(self):
+        # A single adapter owns the (thread-safe) urllib3 connection pool, every
+        # thread gets its own Session on top of it so keep-alive connections are
+        # shared without sharing the non thread-safe Session state.
+        self._adapter = HTTPAdapter(
+            pool_connections=1, pool_maxsize=self.pool_size, pool_block=True
+        )
+        self._local = threading.local()
+        self._latency_lock = threading.Lock()
+        if self.metrics is None:
+            self.metrics = Metrics()
+
+    @property
+    def session(self) -> requests.Session:
+        session = getattr(self._local, "session", None)
+        if session is None:
+            session = requests.Session()
+            session.headers.update({"Content-Type": "application/json"})
+            session.mount("http://", self._adapter)
+            session.mount("https://", self._adapter)
+            self._local.session = session
+        return session
+
+    def close(self) -> None:
+        self._adapter.close()
 
     def _get_url(self, endpoint: str) -> str:
         return "{}{}".format(self.url, endpoint)
 
-    def _req(self, endpoint: str, method: str, body: dict) -> Response:
-        print(
-            ">>> {} {} {}".format(
-                Style.BRIGHT + method.upper() + Style.RESET_ALL,
-                Fore.GREEN + endpoint + Style.RESET_ALL,
-                body,
+    def _record_latency(self, key: str, seconds: float) -> None:
+        with self._latency_lock:
+            stats = self.latency.get(key)
+            if stats is None:
+                stats = self.latency[key] = LatencyStats()
+            stats.add(seconds)
+
+    def _req(self, route: str, method: str, body: dict, *params: str) -> Response:
+        endpoint = route.format(*params)
+        start = perf_counter()
+        try:
+            res = self.session.request(
+                method,
+                self._get_url(endpoint),
+                data=json.dumps(body),
+                timeout=(self.connect_timeout, self.read_timeout),
             )
-        )
-        func = getattr(requests, method)
-        headers = {"Content-Type": "application/json"}
-        res = func(self._get_url(endpoint), headers=headers, data=json.dumps(body))
+        except requests.ConnectionError as e:
+            # A read that times out in the body, not the headers, comes as a
+            # ConnectionError, raise it as the timeout it is
+            if e.args and isinstance(e.args[0], ReadTimeoutError):
+                raise requests.ReadTimeout(*e.args, request=e.request) from e
+            raise
+        elapsed = perf_counter() - start
+        self._record_latency("{} {}".format(method.upper(), route), elapsed)
+        self.metrics.observe("http", elapsed)
+        self.metrics.count("requests" if res.status_code < 400 else "requests_failed")
         if res.status_code == 200:
-            print("<<< {} OK".format(res.status_code))
+            log.info(
+                "request",
+                method=method.upper(),
+                route=route,
+                status=res.status_code,
+                elapsed_ms=round(elapsed * 1000, 3),
+                bytes=len(res.content),
+            )
+            if log.enabled(DEBUG):
+                log.debug("request body", route=route, body=body)
         else:
-            print("<<< {} {}".format(res.status_code, res.text))
+            log.warning(
+                "request failed",
+                method=method.upper(),
+                route=route,
+                status=res.status_code,
+                elapsed_ms=round(elapsed * 1000, 3),
+                response=res.text,
+            )
         return res
 
     def bots_get(self, bot_token: str) -> Optional[Bot]:
-        response = self._req("/bots/{}".format(bot_token), "get", {})
-        data, status = self._return_response_and_status(response)
+        response = self._req("/bots/{}", "get", {}, bot_token)
+        data, status = self._return_raw_response_and_status(response)
         if status == 200:
-            return from_dict(Bot, data)
+            with self.metrics.span("parse"):
+                return parse_bot(data)
         return None
 
     def bots_register(
@@ -49,21 +139,23 @@ class Api:
             "post",
             {"email": email, "name": name, "password": password, "team": team},
         )
-        resp, status = self._return_response_and_status(response)
+        resp, status = self._return_raw_response_and_status(response)
         if status == 200:
-            return from_dict(Bot, resp)
+            with self.metrics.span("parse"):
+                return parse_bot(resp)
         return None
 
     def boards_list(self) -> Optional[List[Board]]:
         response = self._req("/boards", "get", {})
-        resp, status = self._return_response_and_status(response)
+        resp, status = self._return_raw_response_and_status(response)
         if status == 200:
-            return [from_dict(Board, board) for board in resp]
+            with self.metrics.span("parse"):
+                return [parse_board(board) for board in resp]
         return None
 
     def bots_join(self, bot_token: str, board_id: int) -> bool:
         response = self._req(
-            f"/bots/{bot_token}/join", "post", {"preferredBoardId": board_id}
+            "/bots/{}/join", "post", {"preferredBoardId": board_id}, bot_token
         )
 
         resp, status = self._return_response_and_status(response)
@@ -72,21 +164,24 @@ class Api:
         return False
 
     def boards_get(self, board_id: str) -> Optional[Board]:
-        response = self._req("/boards/{}".format(board_id), "get", {})
-        resp, status = self._return_response_and_status(response)
+        response = self._req("/boards/{}", "get", {}, board_id)
+        resp, status = self._return_raw_response_and_status(response)
         if status == 200:
-            return from_dict(Board, resp)
+            with self.metrics.span("parse"):
+                return parse_board(resp)
         return None
 
     def bots_move(self, bot_token: str, direction: str) -> Optional[Board]:
         response = self._req(
-            "/bots/{}/move".format(bot_token),
+            "/bots/{}/move",
             "post",
             {"direction": direction},
+            bot_token,
         )
-        resp, status = self._return_response_and_status(response)
+        resp, status = self._return_raw_response_and_status(response)
         if status == 200:
-            return from_dict(Board, resp)
+            with self.metrics.span("parse"):
+                return parse_board(resp)
         return None
 
     def bots_recover(self, email: str, password: str) -> Optional[str]:
@@ -101,13 +196,21 @@ class Api:
         except:
             return None
 
-    def _return_response_and_status(
+    def _return_raw_response_and_status(
         self, response: Response
     ) -> Tuple[Union[dict, List], int]:
-        resp = response.json()
+        with self.metrics.span("json"):
+            resp = response.json()
 
         response_data = resp.get("data") if isinstance(resp, dict) else resp
         if not response_data:
             response_data = resp
 
-        return decode(response_data), response.status_code
+        return response_data, response.status_code
+
+    def _return_response_and_status(
+        self, response: Response
+    ) -> Tuple[Union[dict, List], int]:
+        response_data, status = self._return_raw_response_and_status(response)
+        with self.metrics.span("decode"):
+            return decode(response_data), status
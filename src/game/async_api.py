@@ -0,0 +1,43 @@
+import asyncio
+from concurrent.futures import Executor
+from dataclasses import dataclass
+from functools import partial
+from typing import List, Optional
+
+from game.api import Api
+from game.models import Board, Bot
+
+
+@dataclass
+class AsyncApi:
+    # Mirrors Api with coroutines. Requests are run on an executor on top of the
+    # pooled, thread-safe Api session so several calls can be in flight at once.
+    api: Api
+    executor: Optional[Executor] = None
+
+    async def _call(self, func, *args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, partial(func, *args))
+
+    async def bots_get(self, bot_token: str) -> Optional[Bot]:
+        return await self._call(self.api.bots_get, bot_token)
+
+    async def bots_register(
+        self, name: str, email: str, password: str, team: str
+    ) -> Optional[Bot]:
+        return await self._call(self.api.bots_register, name, email, password, team)
+
+    async def boards_list(self) -> Optional[List[Board]]:
+        return await self._call(self.api.boards_list)
+
+    async def bots_join(self, bot_token: str, board_id: int) -> bool:
+        return await self._call(self.api.bots_join, bot_token, board_id)
+
+    async def boards_get(self, board_id: str) -> Optional[Board]:
+        return await self._call(self.api.boards_get, board_id)
+
+    async def bots_move(self, bot_token: str, direction: str) -> Optional[Board]:
+        return await self._call(self.api.bots_move, bot_token, direction)
+
+    async def bots_recover(self, email: str, password: str) -> Optional[str]:
+        return await self._call(self.api.bots_recover, email, password)
@@ -0,0 +1,60 @@
+from dataclasses import dataclass, field
+from typing import List, Optional, Set, Tuple
+
+from game.models import Board, GameObject
+
+
+@dataclass
+class BoardDiff:
+    # What changed between two consecutive snapshots, objects matched by id
+    added: List[GameObject] = field(default_factory=list)
+    removed: List[GameObject] = field(default_factory=list)
+    # (previous, current) pairs
+    moved: List[Tuple[GameObject, GameObject]] = field(default_factory=list)
+    changed: List[Tuple[GameObject, GameObject]] = field(default_factory=list)
+    layout_changed: bool = False
+
+    @classmethod
+    def between(cls, previous: Optional[Board], current: Board) -> "BoardDiff":
+        diff = cls()
+        if previous is None:
+            diff.added = list(current.game_objects or [])
+            diff.layout_changed = True
+            return diff
+
+        remaining = {game_object.id: game_object for game_object in previous.game_objects or []}
+        for game_object in current.game_objects or []:
+            old = remaining.pop(game_object.id, None)
+            if old is None:
+                diff.added.append(game_object)
+            elif (
+                old.position.x != game_object.position.x
+                or old.position.y != game_object.position.y
+            ):
+                diff.moved.append((old, game_object))
+            elif old.properties != game_object.properties or old.type != game_object.type:
+                diff.changed.append((old, game_object))
+        diff.removed = list(remaining.values())
+
+        diff.layout_changed = (
+            previous.width != current.width
+            or previous.height != current.height
+            or "TeleportGameObject" in diff.types
+        )
+        return diff
+
+    @property
+    def types(self) -> Set[str]:
+        types = {game_object.type for game_object in self.added}
+        types.update(game_object.type for game_object in self.removed)
+        for old, new in self.moved + self.changed:
+            types.add(old.type)
+            types.add(new.type)
+        return types
+
+    @property
+    def empty(self) -> bool:
+        return not (self.added or self.removed or self.moved or self.changed)
+
+    def __len__(self) -> int:
+        return len(self.added) + len(self.removed) + len(self.moved) + len(self.changed)
@@ -0,0 +1,128 @@
+from collections import deque
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from game.models import Board, Position, position_table
+
+# Exact step distances on a board, taking every teleporter pair into account.
+# Moving onto a teleporter puts the bot on its pair, so a field is a breadth
+# first search over the cells a bot can stand on. Fields only depend on the
+# board size and the teleporter positions, so they are cached per layout and
+# reused across ticks until the teleporters move.
+
+Layout = Tuple[int, int, Tuple[Tuple[str, int, int], ...]]
+
+LAYOUT_CACHE_SIZE = 16
+_layouts: Dict[Layout, "DistanceFields"] = {}
+
+
+class DistanceFields:
+    def __init__(self, width: int, height: int, teleporters: Dict[int, int]):
+        self.width = width
+        self.height = height
+        # Teleporter cell -> cell of its pair
+        self.teleporters = teleporters
+        self._fields: Dict[int, List[int]] = {}
+        self._arrays: Dict[int, np.ndarray] = {}
+        self._steps: List[Optional[List[Tuple[Tuple[int, int], int]]]] = [None] * (width * height)
+
+        # Cell a bot has to reach to get to each cell, see dist_cells
+        self._landing = np.arange(width * height)
+        for cell, pair in teleporters.items():
+            self._landing[cell] = pair
+
+        # Cells a bot ends up on when stepping from each cell
+        positions = position_table(width, height)
+        self._moves: List[List[int]] = [
+            [teleporters.get(target, target) for target in positions.neighbours(cell)]
+            for cell in range(width * height)
+        ]
+
+    def steps(self, cell: int) -> List[Tuple[Tuple[int, int], int]]:
+        # Valid moves from a cell with the cell each one lands on, built lazily
+        steps = self._steps[cell]
+        if steps is None:
+            y, x = divmod(cell, self.width)
+            steps = []
+            for dx, dy in ((1, 0), (-1, 0), (0, 1), (0, -1)):
+                nx, ny = x + dx, y + dy
+                if 0 <= nx < self.width and 0 <= ny < self.height:
+                    target = ny * self.width + nx
+                    steps.append(((dx, dy), self.teleporters.get(target, target)))
+            self._steps[cell] = steps
+        return steps
+
+    def cell(self, position: Position) -> int:
+        return position.pack(self.width)
+
+    def field(self, source: int) -> List[int]:
+        field = self._fields.get(source)
+        if field is None:
+            field = self._fields[source] = self._search(source)
+        return field
+
+    def _search(self, source: int) -> List[int]:
+        moves = self._moves
+        field = [-1] * (self.width * self.height)
+        field[source] = 0
+        queue = deque((source,))
+        while queue:
+            cell = queue.popleft()
+            steps = field[cell] + 1
+            for target in moves[cell]:
+                if field[target] < 0:
+                    field[target] = steps
+                    queue.append(target)
+        return field
+
+    def dist_cells(self, source: int, target: int) -> int:
+        if source == target:
+            return 0
+        # Reaching a teleporter means stepping onto it, which lands on its pair
+        return self.field(source)[self.teleporters.get(target, target)]
+
+    def field_array(self, source: int) -> np.ndarray:
+        array = self._arrays.get(source)
+        if array is None:
+            array = self._arrays[source] = np.array(self.field(source))
+        return array
+
+    def dist_many(self, source: int, targets: np.ndarray) -> np.ndarray:
+        # dist_cells for a whole array of target cells at once
+        distances = self.field_array(source)[self._landing[targets]]
+        distances[targets == source] = 0
+        return distances
+
+    def dist(self, a: Position, b: Position) -> int:
+        return self.dist_cells(self.cell(a), self.cell(b))
+
+
+def layout_of(board: Board) -> Layout:
+    return (
+        board.width,
+        board.height,
+        tuple(
+            sorted(
+                (str(portal.properties.pair_id), portal.position.x, portal.position.y)
+                for portal in board.portals
+            )
+        ),
+    )
+
+
+def distance_fields(board: Board) -> DistanceFields:
+    layout = layout_of(board)
+    fields = _layouts.get(layout)
+    if fields is None:
+        width = board.width
+        teleporters = {}
+        for pair in board.index.portals_by_pair.values():
+            if len(pair) == 2:
+                a, b = (p.position.pack(width) for p in pair)
+                teleporters[a] = b
+                teleporters[b] = a
+        if len(_layouts) >= LAYOUT_CACHE_SIZE:
+            _layouts.clear()
+        fields = _layouts[layout] = DistanceFields(width, board.height, teleporters)
+    return fields
@@ -0,0 +1,103 @@
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from game.models import Board
+
+# Cell flags, a cell can hold more than one object (a bot standing on its base)
+EMPTY = 0
+DIAMOND = 1
+BOT = 2
+BASE = 4
+TELEPORT = 8
+BUTTON = 16
+
+TYPE_FLAGS = {
+    "DiamondGameObject": DIAMOND,
+    "BotGameObject": BOT,
+    "BaseGameObject": BASE,
+    "TeleportGameObject": TELEPORT,
+    "DiamondButtonGameObject": BUTTON,
+}
+
+DIRECTIONS = ((1, 0), (-1, 0), (0, 1), (0, -1))
+
+
+class BoardGrid:
+    # Occupancy arrays of a board snapshot, indexed [y, x]
+    def __init__(self, board: Board):
+        self.width = board.width
+        self.height = board.height
+        shape = (self.height, self.width)
+        self.types = np.zeros(shape, dtype=np.uint8)
+        self.points = np.zeros(shape, dtype=np.int8)
+        self.bot_ids = np.zeros(shape, dtype=np.int32)
+
+        for game_object in board.game_objects or []:
+            x, y = game_object.position.x, game_object.position.y
+            if not (0 <= x < self.width and 0 <= y < self.height):
+                continue
+            flag = TYPE_FLAGS.get(game_object.type, EMPTY)
+            self.types[y, x] |= flag
+            if flag == DIAMOND:
+                self.points[y, x] = game_object.properties.points or 0
+            elif flag == BOT:
+                self.bot_ids[y, x] = game_object.id
+
+        # Coordinate planes used by the vectorized distance queries
+        self._ys, self._xs = np.indices(shape)
+
+    # ==================== Cells ==================== #
+    def in_bounds(self, x: int, y: int) -> bool:
+        return 0 <= x < self.width and 0 <= y < self.height
+
+    def has(self, x: int, y: int, flags: int) -> bool:
+        return bool(self.types[y, x] & flags)
+
+    def is_free(self, x: int, y: int) -> bool:
+        return self.types[y, x] == EMPTY
+
+    def bot_at(self, x: int, y: int) -> Optional[int]:
+        bot_id = int(self.bot_ids[y, x])
+        return bot_id or None
+
+    def mask(self, flags: int) -> np.ndarray:
+        return (self.types & flags) != 0
+
+    # ==================== Neighbourhood ==================== #
+    def neighbours(self, x: int, y: int) -> List[Tuple[int, int]]:
+        return [
+            (x + dx, y + dy)
+            for dx, dy in DIRECTIONS
+            if 0 <= x + dx < self.width and 0 <= y + dy < self.height
+        ]
+
+    def window(self, x: int, y: int, radius: int, array: np.ndarray = None) -> np.ndarray:
+        # Square view of radius cells around (x, y), clipped to the board
+        array = self.types if array is None else array
+        return array[
+            max(0, y - radius) : y + radius + 1, max(0, x - radius) : x + radius + 1
+        ]
+
+    def count_near(self, x: int, y: int, radius: int, flags: int) -> int:
+        # Objects within radius steps (Manhattan) of (x, y)
+        near = self.distances(x, y) <= radius
+        return int(np.count_nonzero(near & self.mask(flags)))
+
+    # ==================== Distance ==================== #
+    def distances(self, x: int, y: int) -> np.ndarray:
+        return np.abs(self._xs - x) + np.abs(self._ys - y)
+
+    def nearest(self, x: int, y: int, mask: np.ndarray) -> Optional[Tuple[int, int]]:
+        # Closest cell where mask is set, ties broken by row then column
+        if not mask.any():
+            return None
+        distances = np.where(mask, self.distances(x, y), np.iinfo(np.int64).max)
+        cell_y, cell_x = np.unravel_index(np.argmin(distances), distances.shape)
+        return int(cell_x), int(cell_y)
+
+    def nearest_of(self, x: int, y: int, flags: int) -> Optional[Tuple[int, int]]:
+        return self.nearest(x, y, self.mask(flags))
+
+    def nearest_diamond(self, x: int, y: int, min_points: int = 1) -> Optional[Tuple[int, int]]:
+        return self.nearest(x, y, self.points >= min_points)
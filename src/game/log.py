@@ -0,0 +1,152 @@
+import atexit
+import json
+import queue
+import sys
+import threading
+from time import time
+from typing import IO, Dict, Optional
+
+# Structured logging that stays off the move path. A call only checks the level
+# and puts a tuple on a bounded queue, a background thread turns the records
+# into JSON lines and writes them. When the queue is full the record is dropped
+# and counted instead of blocking the bot. Until configure() is called nothing
+# is logged at all, so the simulator and the benchmarks stay quiet for free.
+
+DEBUG = 10
+INFO = 20
+WARNING = 30
+ERROR = 40
+OFF = 100
+
+LEVELS = {"debug": DEBUG, "info": INFO, "warning": WARNING, "error": ERROR, "off": OFF}
+LEVEL_NAMES = {level: name for name, level in LEVELS.items()}
+
+QUEUE_SIZE = 10000
+
+# Lowest level that is written, read by every call
+_level = OFF
+_writer: Optional["LogWriter"] = None
+
+
+class LogWriter:
+    def __init__(self, stream: IO[str], queue_size: int = QUEUE_SIZE):
+        self.stream = stream
+        self.queue: "queue.Queue" = queue.Queue(maxsize=queue_size)
+        self.dropped = 0
+        self.written = 0
+        self._thread = threading.Thread(target=self._run, name="log-writer", daemon=True)
+        self._thread.start()
+
+    def put(self, record: tuple) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def _run(self) -> None:
+        while True:
+            record = self.queue.get()
+            if record is None:
+                break
+            lines = [self._format(record)]
+            # Write whatever piled up in one go
+            while True:
+                try:
+                    record = self.queue.get_nowait()
+                except queue.Empty:
+                    break
+                if record is None:
+                    self._write(lines)
+                    return
+                lines.append(self._format(record))
+            self._write(lines)
+
+    def _format(self, record: tuple) -> str:
+        timestamp, level, name, event, fields = record
+        entry = {"ts": round(timestamp, 6), "level": LEVEL_NAMES.get(level, level), "logger": name, "event": event}
+        entry.update(fields)
+        return json.dumps(entry, default=str)
+
+    def _write(self, lines) -> None:
+        self.stream.write("\n".join(lines) + "\n")
+        self.stream.flush()
+        self.written += len(lines)
+
+    def close(self, timeout: float = 1.0) -> None:
+        # Flushes what is queued, a full queue is not waited on for long
+        try:
+            self.queue.put(None, timeout=timeout)
+        except queue.Full:
+            pass
+        self._thread.join(timeout)
+
+
+def _put(record: tuple) -> None:
+    writer = _writer
+    if writer is not None:
+        writer.put(record)
+
+
+class Logger:
+    def __init__(self, name: str):
+        self.name = name
+
+    def enabled(self, level: int) -> bool:
+        return level >= _level
+
+    def log(self, level: int, event: str, **fields) -> None:
+        if level < _level:
+            return
+        _put((time(), level, self.name, event, fields))
+
+    def debug(self, event: str, **fields) -> None:
+        if DEBUG >= _level:
+            _put((time(), DEBUG, self.name, event, fields))
+
+    def info(self, event: str, **fields) -> None:
+        if INFO >= _level:
+            _put((time(), INFO, self.name, event, fields))
+
+    def warning(self, event: str, **fields) -> None:
+        if WARNING >= _level:
+            _put((time(), WARNING, self.name, event, fields))
+
+    def error(self, event: str, **fields) -> None:
+        if ERROR >= _level:
+            _put((time(), ERROR, self.name, event, fields))
+
+
+_loggers: Dict[str, Logger] = {}
+
+
+def get_logger(name: str) -> Logger:
+    logger = _loggers.get(name)
+    if logger is None:
+        logger = _loggers[name] = Logger(name)
+    return logger
+
+
+def configure(level: str = "info", path: Optional[str] = None, queue_size: int = QUEUE_SIZE) -> None:
+    # Logs go to stderr unless a file is given, "off" disables logging again
+    global _level, _writer
+    shutdown()
+    if LEVELS[level] >= OFF:
+        return
+    stream = open(path, "a", buffering=1) if path else sys.stderr
+    _writer = LogWriter(stream, queue_size)
+    _level = LEVELS[level]
+
+
+def shutdown() -> None:
+    global _level, _writer
+    writer = _writer
+    _level, _writer = OFF, None
+    if writer is not None:
+        writer.close()
+        if writer.dropped:
+            print("{} log records dropped, the log queue was full".format(writer.dropped), file=sys.stderr)
+        if writer.stream is not sys.stderr:
+            writer.stream.close()
+
+
+atexit.register(shutdown)
@@ -1,9 +1,18 @@
 from abc import ABC
-from typing import Tuple
+from typing import Optional, Tuple
 
+from game.metrics import Metrics
 from game.models import Board, GameObject
 
 
 class BaseLogic(ABC):
     def next_move(self, board_bot: GameObject, board: Board) -> Tuple[int, int]:
         raise NotImplementedError()
+
+    def report(self, metrics: Metrics) -> None:
+        # Called after every decision, for controllers that count their own work
+        pass
+
+    def summary(self) -> Optional[str]:
+        # Printed at game over, None when there is nothing to tell
+        return None
@@ -0,0 +1,15 @@
+from game.logic.myBot import MyBot
+from game.logic.searchBot import SearchBot
+from game.logic.otherBots.random import Random
+from game.logic.otherBots.points import Points
+from game.logic.otherBots.chase import Chase
+from game.logic.otherBots.stay import Stay
+
+CONTROLLERS = {
+    "Random": Random,
+    "Points" : Points,
+    "MyBot" : MyBot,
+    "Search" : SearchBot,
+    "Chase" : Chase,
+    "Stay" : Stay
+}
@@ -1,7 +1,13 @@
+import numpy as np
 from game.logic.base import BaseLogic
-from game.models import Board, GameObject
+from game.logic.planner import Plan, plan_route
+from game.log import get_logger
+from game.models import Board, GameObject, Position
+from game.risk import OpponentTracker
 from random import randint
 
+log = get_logger("MyBot")
+
 # GAME OBJECT TYPE:
 # - Bot : BotGameObject 
 # - Base : BaseGameObject 
@@ -29,28 +35,24 @@ class MyBot(BaseLogic):
         self.blue_diamonds : list[GameObject] = []
         self.closest_enemy : GameObject = None
 
+        # Route planner, budget in milliseconds per move
+        self.plan_budget_ms : float = 5.0
+        self.plan : Plan = None
+
+        # Where the enemies are heading, and the chance of a tackle on each cell
+        self.tracker : OpponentTracker = OpponentTracker()
+        # Highest tackle risk taken, by saferMove and by the planned route
+        self.risk_limit : float = 0.3
+
     # ==================== GETTER ==================== #
     def getGameObjects(self, board: Board) -> None:
-        self.objects_base = []
-        self.objects_portal = []
-        self.objects_button = []
-
-        for game_object in board.game_objects:
-            if game_object.type == "BaseGameObject":
-                self.objects_base.append(game_object)
-            elif game_object.type == "TeleportGameObject":
-                self.objects_portal.append(game_object)
-            elif game_object.type == "DiamondButtonGameObject":
-                self.objects_button.append(game_object)
-    def getDiamondsObject(self, board: Board) -> None:
-        self.red_diamonds = []
-        self.blue_diamonds = []
+        self.objects_base = board.bases
+        self.objects_portal = board.portals
+        self.objects_button = board.diamond_buttons
 
-        for diamond in board.diamonds:
-            if diamond.properties.points == 2:
-                self.red_diamonds.append(diamond)
-            else:
-                self.blue_diamonds.append(diamond)
+    def getDiamondsObject(self, board: Board) -> None:
+        self.red_diamonds = board.red_diamonds
+        self.blue_diamonds = board.blue_diamonds
 
     def getBots(self, board: Board) -> list[GameObject]: return board.bots
     def getEnemyBots(self, this_bot: GameObject, board: Board) -> list[GameObject]: return [enemy for enemy in board.bots if enemy != this_bot]
@@ -73,7 +75,10 @@ class MyBot(BaseLogic):
         portals = self.getPortals()
         
         if portals:
-            closest_portal = min(portals, key=lambda portal: self.distanceWithoutPortal(this_bot, portal))
+            xs = np.array([portal.position.x for portal in portals])
+            ys = np.array([portal.position.y for portal in portals])
+            distances = np.abs(ys - this_bot.position.y) + np.abs(xs - this_bot.position.x)
+            closest_portal = portals[int(np.argmin(distances))]
             for portal in portals:
                 if portal.properties.pair_id == closest_portal.properties.pair_id and closest_portal.id != portal.id:
                     return closest_portal, portal
@@ -83,26 +88,18 @@ class MyBot(BaseLogic):
     def getDiamondButton(self) -> GameObject: return self.objects_button[0]
 
     # ===== Get Closest ===== #
-    def getClosestRedDiamond(self, this_bot: GameObject, board: Board) -> GameObject:
-        red_diamonds = self.getRedDiamonds()
-        if not red_diamonds:
-            return None
-        return min(red_diamonds, key=lambda diamond: self.distance(this_bot, diamond, board))
-    def getClosestBlueDiamond(self, this_bot: GameObject, board: Board) -> GameObject:
-        blue_diamonds = self.getBlueDiamonds()
-        if not blue_diamonds:
-            return None
-        return min(blue_diamonds, key=lambda diamond: self.distance(this_bot, diamond, board))
-    def getClosestDiamond(self, this_bot: GameObject, board: Board) -> GameObject:
-        diamonds = self.getDiamonds(board)
-        if not diamonds:
+    def closestOf(self, this_bot: GameObject, board: Board, candidates: list[GameObject]) -> GameObject:
+        # All distances are looked up at once. Ties go to the first candidate, same as min().
+        if not candidates:
             return None
-        return min(diamonds, key=lambda diamond: self.distance(this_bot, diamond, board))
-    def getClosestEnemy(self, this_bot: GameObject, board: Board) -> GameObject:
-        enemies = self.getEnemyBots(this_bot, board)
-        if not enemies:
-            return None
-        return min(enemies, key=lambda enemies: self.distance(this_bot, enemies, board))
+        fields = board.distances
+        cells = np.array([candidate.position.pack(board.width) for candidate in candidates])
+        return candidates[int(np.argmin(fields.dist_many(fields.cell(this_bot.position), cells)))]
+
+    def getClosestRedDiamond(self, this_bot: GameObject, board: Board) -> GameObject: return self.closestOf(this_bot, board, self.getRedDiamonds())
+    def getClosestBlueDiamond(self, this_bot: GameObject, board: Board) -> GameObject: return self.closestOf(this_bot, board, self.getBlueDiamonds())
+    def getClosestDiamond(self, this_bot: GameObject, board: Board) -> GameObject: return self.closestOf(this_bot, board, self.getDiamonds(board))
+    def getClosestEnemy(self, this_bot: GameObject, board: Board) -> GameObject: return self.closestOf(this_bot, board, self.getEnemyBots(this_bot, board))
 
     # ===== Get Inventory ===== #
     def getUsedInventorySpace(self, this_bot:GameObject) -> int: return this_bot.properties.diamonds
@@ -121,7 +118,7 @@ class MyBot(BaseLogic):
     def distance(self, objectFrom: GameObject, objectTo: GameObject, board: Board) -> int: 
         # TODO Ignore Portal Distance addition
         if objectTo.type =="TeleportGameObject": return self.distanceWithoutPortal(objectFrom, objectTo)
-        return min(self.distanceWithoutPortal(objectFrom, objectTo), self.distanceUsingPortal(objectFrom, objectTo))
+        return board.distances.dist(objectFrom.position, objectTo.position)
     def distanceWithoutPortal(self, objectFrom: GameObject, objectTo: GameObject) -> int: return abs(objectFrom.position.y - objectTo.position.y) + abs(objectFrom.position.x - objectTo.position.x)
     def distanceSelfUsingPortal(self, objectTo: GameObject) -> int:
         return self.distance_self_to_closest_portal + self.distanceWithoutPortal(self.closest_portal_pair[1], objectTo)
@@ -188,26 +185,30 @@ class MyBot(BaseLogic):
                     if x_diff < 0 : return self.moveRight()
                     else : return self.moveLeft()
 
-        if self.step_ignore_portal == 1: self.step_ignore_portal = 0; print("IGNORE PORTAL Follow up"); return self.moveRight()
-        elif self.step_ignore_portal == 2: self.step_ignore_portal = 0; print("IGNORE PORTAL Follow up"); return self.moveLeft()
-        elif self.step_ignore_portal == 3: self.step_ignore_portal = 0; print("IGNORE PORTAL Follow up"); return self.moveUp()
-        elif self.step_ignore_portal == 4: self.step_ignore_portal = 0; print("IGNORE PORTAL Follow up"); return self.moveDown()
+        if self.step_ignore_portal == 1: self.step_ignore_portal = 0; log.debug("ignore portal follow up"); return self.moveRight()
+        elif self.step_ignore_portal == 2: self.step_ignore_portal = 0; log.debug("ignore portal follow up"); return self.moveLeft()
+        elif self.step_ignore_portal == 3: self.step_ignore_portal = 0; log.debug("ignore portal follow up"); return self.moveUp()
+        elif self.step_ignore_portal == 4: self.step_ignore_portal = 0; log.debug("ignore portal follow up"); return self.moveDown()
 
         # Move directly toward objective
+        x_move = self.moveRight() if x_diff < 0 else self.moveLeft() if x_diff > 0 else None
+        y_move = self.moveUp() if y_diff < 0 else self.moveDown() if y_diff > 0 else None
         if self.step_variation :
             self.step_variation = False
-            if x_diff < 0 : return self.moveRight()
-            elif x_diff > 0 : return self.moveLeft()
-            elif y_diff < 0 : return self.moveUp()
-            elif y_diff > 0 : return self.moveDown()
+            return self.saferMove(this_bot, x_move, y_move)
         else:
             self.step_variation = True
-            if y_diff < 0 : return self.moveUp()
-            elif y_diff > 0 : return self.moveDown()
-            elif x_diff < 0 : return self.moveRight()
-            elif x_diff > 0 : return self.moveLeft()
-
-        return None
+            return self.saferMove(this_bot, y_move, x_move)
+
+    def saferMove(self, this_bot: GameObject, preferred: tuple[int, int], other: tuple[int, int]) -> tuple[int, int]:
+        # Both moves get closer to the objective, carrying diamonds take the other one if the preferred one is likely to be tackled
+        if preferred is None or other is None or self.isInventoryEmpty(this_bot):
+            return preferred or other
+        if self.moveRisk(this_bot, preferred) > self.risk_limit and self.moveRisk(this_bot, other) < self.moveRisk(this_bot, preferred):
+            return other
+        return preferred
+    def moveRisk(self, this_bot: GameObject, move: tuple[int, int]) -> float:
+        return self.tracker.risk_at(Position(this_bot.position.y + move[1], this_bot.position.x + move[0]))
     
     # ===== Move to Object ===== #
     def moveToBase(self, this_bot: GameObject, board: Board) -> tuple[int, int]:
@@ -224,12 +225,9 @@ class MyBot(BaseLogic):
     # CURRENT ALGORITHM :
     #   1. If the time left is less than the distance to the base, then the bot will go to the base    
     #   2. If the Enemy is within one move, then the bot will attack it, unless the enemy is in it's base     
-    #   3. If the bot's inventory is full, it will go to the base to deposit the diamonds  
-    #   4. If the bot's inventory is half full but the base is near, deposit the diamonds    
-    #   5. Go to the nearest diamond if inventory space is more than equal to 2   
-    #   6. Go to the nearest blue diamond that is within 2 moves, if the bot's inventory is not full  
-    #   7. If no diamonds are found, and the bot's inventory is not empty, then it will go to the base  
-    #   8. If no diamonds are found and the bot's inventory is empty, then it will go to the diamond button  
+    #   3. Follow the planned route, the diamonds that deliver the most points per step that fit in the inventory and time left, avoiding likely tackles  
+    #   4. If no diamonds fit in the route, and the bot's inventory is not empty, then it will go to the base  
+    #   5. If no diamonds fit in the route and the bot's inventory is empty, then it will go to the diamond button  
     #
     # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # #
     
@@ -245,6 +243,7 @@ class MyBot(BaseLogic):
         self.distance_self_to_closest_portal = self.distanceToClosestPortal(this_bot)
         self.current_distance_to_base = self.distanceToBase(this_bot, board)
         self.current_inventory_space = self.getEmptyInventorySpace(this_bot)
+        self.tracker.update(board, this_bot)
 
     # 1. If the time left is less than the distance to the base, then the bot will go to the base    
         if not self.isInventoryEmpty(this_bot) and self.getTimeRemaining(this_bot) - 2 <= self.current_distance_to_base:
@@ -263,34 +262,19 @@ class MyBot(BaseLogic):
         elif self.step_chase_enemy < 5:
             self.step_chase_enemy += 1
 
-    # 3. If the bot's inventory is full, it will go to the base to deposit the diamonds  
-        if self.isInventoryFull():  
-            # print("Inventory Full.")
-            return self.moveToBase(this_bot, board)
-
-    # 4. If the bot's inventory is half full but the base is near, deposit the diamonds    
-        if self.current_distance_to_base <= 2 and self.current_inventory_space <= (this_bot.properties.inventory_size // 2):
-            return self.moveToBase(this_bot, board)
+    # 3. Follow the planned route, the diamonds that deliver the most points per step that fit in the inventory and time left, avoiding likely tackles  
+        self.plan = plan_route(
+            this_bot, board, self.base, self.plan_budget_ms, risk=self.tracker.risk, risk_limit=self.risk_limit
+        )
+        if self.plan.route:
+            return self.moveToObjective(this_bot, self.plan.route[0], board)
 
-    # 5. Go to the nearest diamond if inventory space is more than equal to 2
-        closest_diamond = self.getClosestDiamond(this_bot, board) 
-        if closest_diamond and self.current_inventory_space >= 2:
-            # print(f"Going to Diamond. Location : {closest_diamond.position}")
-            return self.moveToObjective(this_bot, closest_diamond, board) 
-            
-    # 6. Go to the nearest blue diamond that is within 2 moves, if the bot's inventory is not full  
-        if closest_diamond.properties.points == 2:
-            closest_diamond = self.getClosestBlueDiamond(this_bot, board)
-        if closest_diamond and not self.isInventoryFull() and closest_diamond.properties.points == 1 and self.distance(this_bot, closest_diamond, board) <= 2:
-            # print(f"Going to Diamond. Location : {closest_diamond.position}")
-            return self.moveToObjective(this_bot, closest_diamond, board) 
-
-    # 7. If no diamonds are found, and the bot's inventory is not empty, then it will go to the base  
+    # 4. If no diamonds fit in the route, and the bot's inventory is not empty, then it will go to the base  
         if(not self.isInventoryEmpty(this_bot)):
             # print("Emptying Inventory.")
             return self.moveToBase(this_bot, board)
         
-    # 8. If no diamonds are found and the bot's inventory is empty, then it will go to the diamond button  
+    # 5. If no diamonds fit in the route and the bot's inventory is empty, then it will go to the diamond button  
         # print("Going to Diamond Button.")
 
         return self.moveToDiamondButton(this_bot, board)
\ No newline at end of file
@@ -20,19 +20,15 @@ class Chase(BaseLogic):
     # ==================== GETTER ==================== #
     def getBots(self, board: Board) -> list[GameObject]: return board.bots
     def getEnemyBots(self, this_bot: GameObject, board: Board) -> list[GameObject]: return [enemy for enemy in board.bots if enemy != this_bot]
-    def getBases(self, board: Board) -> list[GameObject]: return [base for base in board.game_objects if base.type=="BaseGameObject"]
-    def getHomeBaseObject(self, this_bot: GameObject, board: Board) -> GameObject: 
-        for base in self.getBases(board):
-            if base.properties.name == this_bot.properties.name:
-                return base
-        return None
+    def getBases(self, board: Board) -> list[GameObject]: return board.bases
+    def getHomeBaseObject(self, this_bot: GameObject, board: Board) -> GameObject: return board.get_base(this_bot.properties.name)
     
     def getDiamonds(self, board: Board) -> list[GameObject]: return board.diamonds
-    def getRedDiamonds(self, board: Board) -> list[GameObject]: return [diamond for diamond in board.diamonds if diamond.properties.points == 2]
-    def getBlueDiamonds(self, board: Board) -> list[GameObject]: return [diamond for diamond in board.diamonds if diamond.properties.points == 1]
+    def getRedDiamonds(self, board: Board) -> list[GameObject]: return board.red_diamonds
+    def getBlueDiamonds(self, board: Board) -> list[GameObject]: return board.blue_diamonds
     
-    def getPortals(self, board: Board) -> list[GameObject]: return [home for home in board.game_objects if home.type=="TeleportGameObject"]
-    def getDiamondButton(self, board: Board) -> GameObject: return [home for home in board.game_objects if home.type=="DiamondButtonGameObject"][0]
+    def getPortals(self, board: Board) -> list[GameObject]: return board.portals
+    def getDiamondButton(self, board: Board) -> GameObject: return board.diamond_buttons[0]
 
     def getClosestRedDiamond(self, this_bot: GameObject, board: Board) -> GameObject:
         red_diamonds = self.getRedDiamonds(board)
@@ -71,7 +67,7 @@ class Chase(BaseLogic):
     def isInventoryEmpty(self, this_bot: GameObject) -> bool: return this_bot.properties.diamonds == 0
 
     # ===== Distance ====== #
-    def distance(self, objectFrom: GameObject, objectTo: GameObject, board: Board) -> int: return min(self.distanceWithoutPortal(objectFrom, objectTo), self.distanceUsingPortal(objectFrom, objectTo, board))
+    def distance(self, objectFrom: GameObject, objectTo: GameObject, board: Board) -> int: return board.distances.dist(objectFrom.position, objectTo.position)
     def distanceWithoutPortal(self, objectFrom: GameObject, objectTo: GameObject) -> int: return abs(objectFrom.position.y - objectTo.position.y) + abs(objectFrom.position.x - objectTo.position.x)
     def distanceUsingPortal(self, objectFrom: GameObject, objectTo: GameObject, board: Board) -> int:
         portals = self.getSortedPortals(objectFrom, board)
@@ -1,7 +1,10 @@
 from game.logic.base import BaseLogic
+from game.log import get_logger
 from game.models import Board, GameObject
 from random import randint
 
+log = get_logger("Points")
+
 # GAME OBJECT TYPE:
 # - Bot : BotGameObject 
 # - Base : BaseGameObject 
@@ -16,18 +19,14 @@ class Points(BaseLogic):
     # ==================== GETTER ==================== #
     def getBots(self, board: Board) -> list[GameObject]: return board.bots
     def getEnemyBots(self, thisBot: GameObject, board: Board) -> list[GameObject]: return [enemy for enemy in board.bots if enemy != thisBot]
-    def getBases(self, board: Board) -> list[GameObject]: return [base for base in board.game_objects if base.type=="BaseGameObject"]
-    def getHomeBaseObject(self, thisBot: GameObject, board: Board) -> GameObject: 
-        for base in self.getBases(board):
-            if base.properties.name == thisBot.properties.name:
-                return base
-        return None
+    def getBases(self, board: Board) -> list[GameObject]: return board.bases
+    def getHomeBaseObject(self, thisBot: GameObject, board: Board) -> GameObject: return board.get_base(thisBot.properties.name)
     
     def getDiamonds(self, board: Board) -> list[GameObject]: return board.diamonds
-    def getRedDiamonds(self, board: Board) -> list[GameObject]: return [diamond for diamond in board.diamonds if diamond.properties.points == 2]
-    def getBlueDiamonds(self, board: Board) -> list[GameObject]: return [diamond for diamond in board.diamonds if diamond.properties.points == 1]
+    def getRedDiamonds(self, board: Board) -> list[GameObject]: return board.red_diamonds
+    def getBlueDiamonds(self, board: Board) -> list[GameObject]: return board.blue_diamonds
     
-    def getPortals(self, board: Board) -> list[GameObject]: return [home for home in board.game_objects if home.type=="TeleportGameObject"]
+    def getPortals(self, board: Board) -> list[GameObject]: return board.portals
     def getSortedPortals(self, this_bot: GameObject, board: Board) -> list[GameObject]: 
         # Sort portals based on distance to bot
         portals = self.getPortals(board)
@@ -35,7 +34,7 @@ class Points(BaseLogic):
             return portals[0], portals[1]
         else:
             return portals[1], portals[0]
-    def getDiamondButton(self, board: Board) -> GameObject: return [home for home in board.game_objects if home.type=="DiamondButtonGameObject"][0]
+    def getDiamondButton(self, board: Board) -> GameObject: return board.diamond_buttons[0]
 
     def getClosestRedDiamond(self, thisBot: GameObject, board: Board) -> GameObject:
         red_diamonds = self.getRedDiamonds(board)
@@ -65,7 +64,7 @@ class Points(BaseLogic):
     def isInventoryFull(self, this_bot: GameObject) -> bool: return this_bot.properties.diamonds == this_bot.properties.inventory_size
 
     # ===== Distance ====== #
-    def distance(self, objectFrom: GameObject, objectTo: GameObject, board: Board) -> int: return min(self.distanceWithoutPortal(objectFrom, objectTo), self.distanceUsingPortal(objectFrom, objectTo, board))
+    def distance(self, objectFrom: GameObject, objectTo: GameObject, board: Board) -> int: return board.distances.dist(objectFrom.position, objectTo.position)
     def distanceWithoutPortal(self, objectFrom: GameObject, objectTo: GameObject) -> int: return abs(objectFrom.position.y - objectTo.position.y) + abs(objectFrom.position.x - objectTo.position.x)
     def distanceUsingPortal(self, objectFrom: GameObject, objectTo: GameObject, board: Board) -> int:
         portals = self.getSortedPortals(objectFrom, board)
@@ -120,25 +119,25 @@ class Points(BaseLogic):
     # ===== MAIN FUNCTION ===== #
     def next_move(self, this_bot: GameObject, board: Board):
         if self.isInventoryFull(this_bot):
-            print("Inventory Full.")
+            log.debug("inventory full")
             return self.moveToBase(this_bot, board)
         
         if(self.getEmptyInventorySpace(this_bot) >= 2):
             temp:GameObject = self.getClosestRedDiamond(this_bot, board)
             if temp != None:
-                print(f"Going to red Diamond. Location : {temp.position}")
+                log.debug("going to red diamond", x=temp.position.x, y=temp.position.y)
                 return self.moveToObjective(this_bot, temp, board) 
         
         temp:GameObject = self.getClosestBlueDiamond(this_bot, board)
         if temp != None:
-            print(f"Going to Blue Diamond. Location : {temp.position}")
+            log.debug("going to blue diamond", x=temp.position.x, y=temp.position.y)
             return self.moveToObjective(this_bot, temp, board)
 
         if(self.getEmptyInventorySpace(this_bot) >= 1):
-            print("Emptying Inventory.")
+            log.debug("emptying inventory")
             return self.moveToBase(this_bot, board)
         
-        print("Going to Diamond Button.")
+        log.debug("going to diamond button")
         return self.moveToObjective(this_bot, self.getDiamondButton(board), board)
 
 
@@ -0,0 +1,171 @@
+from dataclasses import dataclass, field
+from math import ceil
+from time import perf_counter
+from typing import List, Optional
+
+import numpy as np
+
+from game.models import Board, GameObject
+
+# Plans which diamonds to pick up, in which order, before going back to base.
+# It is an orienteering problem with a capacity: maximise the points delivered
+# per step over the whole trip, subject to the free inventory space and to the
+# moves left before the bot's time runs out. Solved with a depth first branch
+# and bound over the closest candidates, seeded with a greedy route so a valid
+# plan exists before the search starts and whenever the budget runs out.
+
+
+@dataclass
+class Plan:
+    # Diamonds in visiting order, the trip always ends at the base
+    route: List[GameObject] = field(default_factory=list)
+    points: int = 0
+    steps: int = 0
+    nodes: int = 0
+    complete: bool = True
+
+    @property
+    def rate(self) -> float:
+        return self.points / self.steps if self.steps else 0.0
+
+
+def moves_left(this_bot: GameObject, board: Board) -> int:
+    delay = max(1, board.minimum_delay_between_moves)
+    return this_bot.properties.milliseconds_left // delay
+
+
+def _distance_matrix(board: Board, this_bot: GameObject, nodes: List[GameObject], base: GameObject) -> np.ndarray:
+    # Node 0 is the bot, the last node is the base. Pairwise distances use at
+    # most one teleporter, the rows from the bot and the column to the base are
+    # exact distance fields.
+    xs = np.array([this_bot.position.x] + [n.position.x for n in nodes] + [base.position.x])
+    ys = np.array([this_bot.position.y] + [n.position.y for n in nodes] + [base.position.y])
+    matrix = np.abs(xs[:, None] - xs[None, :]) + np.abs(ys[:, None] - ys[None, :])
+    for pair in board.index.portals_by_pair.values():
+        if len(pair) != 2:
+            continue
+        for a, b in (pair, pair[::-1]):
+            to_a = np.abs(xs - a.position.x) + np.abs(ys - a.position.y)
+            from_b = np.abs(xs - b.position.x) + np.abs(ys - b.position.y)
+            np.minimum(matrix, to_a[:, None] + from_b[None, :], out=matrix)
+
+    fields = board.distances
+    cells = ys * board.width + xs
+    matrix[0, :] = fields.dist_many(int(cells[0]), cells)
+    matrix[:, -1] = fields.dist_many(int(cells[-1]), cells)
+    return matrix
+
+
+def plan_route(
+    this_bot: GameObject,
+    board: Board,
+    base: GameObject,
+    budget_ms: float = 5.0,
+    max_candidates: int = 10,
+    margin: int = 2,
+    risk: Optional[np.ndarray] = None,
+    risk_limit: Optional[float] = None,
+) -> Plan:
+    # Diamonds on cells where a tackle is more likely than risk_limit are left out
+    deadline = perf_counter() + budget_ms / 1000
+    properties = this_bot.properties
+    carried = properties.diamonds or 0
+    capacity = (properties.inventory_size or 0) - carried
+    time_left = moves_left(this_bot, board) - margin
+
+    fields = board.distances
+    source = fields.cell(this_bot.position)
+    diamonds = [d for d in board.diamonds if (d.properties.points or 0) <= capacity]
+    if risk is not None and risk.size and risk_limit is not None:
+        diamonds = [d for d in diamonds if risk[d.position.y, d.position.x] <= risk_limit]
+    if diamonds:
+        cells = np.array([d.position.pack(board.width) for d in diamonds])
+        order = np.argsort(fields.dist_many(source, cells), kind="stable")[:max_candidates]
+        diamonds = [diamonds[i] for i in order]
+
+    nodes = len(diamonds)
+    home = nodes + 1
+    matrix = _distance_matrix(board, this_bot, diamonds, base).tolist()
+    points = [0] + [d.properties.points or 0 for d in diamonds]
+
+    # Going straight home is the baseline plan, with nothing to deliver it is
+    # only kept when no diamond can be reached in time
+    best = Plan([], carried, matrix[0][home])
+    best_route: List[int] = []
+    best_rate = best.rate if carried else 0.0
+
+    # Greedy seed: keep taking the closest diamond that still fits
+    route, position, steps, gathered, left = [], 0, 0, 0, capacity
+    while True:
+        options = [
+            n
+            for n in range(1, nodes + 1)
+            if n not in route
+            and points[n] <= left
+            and steps + matrix[position][n] + matrix[n][home] <= time_left
+        ]
+        if not options:
+            break
+        n = min(options, key=lambda n: matrix[position][n])
+        route.append(n)
+        steps += matrix[position][n]
+        gathered += points[n]
+        left -= points[n]
+        position = n
+    if route:
+        total = steps + matrix[position][home]
+        rate = (carried + gathered) / total if total else float("inf")
+        if rate > best_rate:
+            best_rate, best_route = rate, list(route)
+            best = Plan([], carried + gathered, total)
+
+    # Branch and bound over ordered subsets
+    visited = [False] * (nodes + 1)
+    stack_route: List[int] = []
+    explored = 0
+    complete = True
+
+    def bound(steps: int, gathered: int, left: int) -> float:
+        # Every further diamond costs at least one step and is worth at most
+        # two points, returning home costs nothing at best
+        best_bound = 0.0
+        for extra in range(ceil(left / 2) + 1):
+            total = steps + extra
+            if total:
+                best_bound = max(best_bound, (carried + gathered + min(left, 2 * extra)) / total)
+        return best_bound if steps else float("inf")
+
+    def search(position: int, steps: int, gathered: int, left: int) -> None:
+        nonlocal best_rate, best_route, best, explored, complete
+        explored += 1
+        if explored & 255 == 0 and perf_counter() > deadline:
+            complete = False
+            return
+        if stack_route:
+            total = steps + matrix[position][home]
+            rate = (carried + gathered) / total if total else float("inf")
+            if rate > best_rate:
+                best_rate, best_route = rate, list(stack_route)
+                best = Plan([], carried + gathered, total)
+        if left <= 0 or bound(steps, gathered, left) <= best_rate:
+            return
+        row = matrix[position]
+        for n in sorted(range(1, nodes + 1), key=row.__getitem__):
+            if visited[n] or points[n] > left:
+                continue
+            reach = steps + row[n]
+            if reach + matrix[n][home] > time_left:
+                continue
+            visited[n] = True
+            stack_route.append(n)
+            search(n, reach, gathered + points[n], left - points[n])
+            stack_route.pop()
+            visited[n] = False
+            if not complete:
+                return
+
+    search(0, 0, 0, capacity)
+    best.route = [diamonds[n - 1] for n in best_route]
+    best.nodes = explored
+    best.complete = complete
+    return best
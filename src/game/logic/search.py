@@ -0,0 +1,287 @@
+from dataclasses import dataclass, field
+from heapq import nlargest
+from time import perf_counter
+from typing import Dict, List, Optional, Tuple
+
+from game.distance import DistanceFields
+from game.models import Board, GameObject
+
+# Anytime beam search over the next moves of one bot. The opponents are not
+# searched: their paths are predicted once per decision with the Chase or the
+# Points behaviour, so a node only holds the bot's own state as a flat tuple
+# of ints and expanding it costs a handful of list lookups. The search goes one
+# move deeper per iteration and the best first move of the deepest finished
+# iteration is returned when the deadline expires.
+
+Move = Tuple[int, int]
+
+# (cell, carried, gained, taken diamonds bitmask, first move, value)
+Node = Tuple[int, int, int, int, Optional[Move], float]
+
+# Weights of the leaf evaluation
+CARRY_WEIGHT = 0.8
+RETURN_WEIGHT = 0.02
+SEEK_WEIGHT = 0.3
+
+# Only diamonds and opponents this close (in steps per move of the horizon)
+# can matter to the search
+REACH_FACTOR = 2
+MAX_CANDIDATES = 24
+
+# How often the deadline is checked, in expanded beam nodes
+DEADLINE_CHECK = 32
+
+
+@dataclass
+class SearchResult:
+    move: Optional[Move] = None
+    value: float = 0.0
+    nodes: int = 0
+    depth: int = 0
+    elapsed: float = 0.0
+    # The horizon was reached before the deadline
+    complete: bool = False
+
+
+@dataclass
+class SearchStats:
+    decisions: int = 0
+    nodes: int = 0
+    depth: int = 0
+    max_depth: int = 0
+    complete: int = 0
+    elapsed: float = 0.0
+
+    def add(self, result: SearchResult) -> None:
+        self.decisions += 1
+        self.nodes += result.nodes
+        self.depth += result.depth
+        self.max_depth = max(self.max_depth, result.depth)
+        self.complete += result.complete
+        self.elapsed += result.elapsed
+
+    def summary(self) -> str:
+        decisions = max(1, self.decisions)
+        return "{} decisions, {:.0f} nodes and depth {:.1f} (max {}) per move, {:.0f} nodes/s, {:.0%} complete".format(
+            self.decisions,
+            self.nodes / decisions,
+            self.depth / decisions,
+            self.max_depth,
+            self.nodes / self.elapsed if self.elapsed else 0.0,
+            self.complete / decisions,
+        )
+
+
+@dataclass
+class Prediction:
+    # Cell and carried diamonds of an opponent after every move, index 0 is now
+    name: str
+    model: str
+    path: List[int] = field(default_factory=list)
+    carried: List[int] = field(default_factory=list)
+
+
+def _toward(fields: DistanceFields, cell: int, target: int) -> int:
+    # One step the way the Chase and Points controllers walk, x first
+    width = fields.width
+    y, x = divmod(cell, width)
+    ty, tx = divmod(target, width)
+    if tx != x:
+        x += 1 if tx > x else -1
+    elif ty != y:
+        y += 1 if ty > y else -1
+    else:
+        return cell
+    target = y * width + x
+    return fields.teleporters.get(target, target)
+
+
+def predict(
+    opponent: GameObject,
+    model: str,
+    fields: DistanceFields,
+    diamonds: Dict[int, int],
+    target: int,
+    horizon: int,
+) -> Prediction:
+    # Chase walks to the target bot, Points to the closest diamond that fits
+    # (red first while there is room for it) and home once it is full
+    properties = opponent.properties
+    capacity = properties.inventory_size or 0
+    base = properties.base
+    home = base.pack(fields.width) if base else -1
+    cell = fields.cell(opponent.position)
+    carried = properties.diamonds or 0
+    left = dict(diamonds)
+    prediction = Prediction(properties.name, model, [cell], [carried])
+    width = fields.width
+
+    for _ in range(horizon):
+        if model == "chase":
+            goal = target
+        elif carried >= capacity or not left:
+            goal = home
+        else:
+            y, x = divmod(cell, width)
+
+            def cost(candidate: int) -> Tuple[int, int]:
+                cy, cx = divmod(candidate, width)
+                red_first = 0 if capacity - carried >= 2 and left[candidate] == 2 else 1
+                return red_first, abs(cy - y) + abs(cx - x)
+
+            fitting = [d for d, points in left.items() if carried + points <= capacity]
+            goal = min(fitting, key=cost) if fitting else home
+        if goal >= 0:
+            cell = _toward(fields, cell, goal)
+        points = left.get(cell)
+        if points is not None and carried + points <= capacity:
+            carried += points
+            del left[cell]
+        if cell == home:
+            carried = 0
+        prediction.path.append(cell)
+        prediction.carried.append(carried)
+    return prediction
+
+
+def search(
+    this_bot: GameObject,
+    board: Board,
+    deadline: float,
+    models: Dict[str, str],
+    max_depth: int = 20,
+    beam_width: int = 192,
+) -> SearchResult:
+    start = perf_counter()
+    fields = board.distances
+    width = fields.width
+    properties = this_bot.properties
+    capacity = properties.inventory_size or 0
+    base = properties.base
+    home = base.pack(width)
+    root = fields.cell(this_bot.position)
+    moves_left = properties.milliseconds_left // max(1, board.minimum_delay_between_moves)
+    horizon = max(1, min(max_depth, moves_left))
+    reach = REACH_FACTOR * horizon
+    to_home = fields.field(home)
+
+    def near(position) -> bool:
+        return abs(position.x - this_bot.position.x) + abs(position.y - this_bot.position.y) <= reach
+
+    # Candidate diamonds, numbered for the taken bitmask
+    all_diamonds = {d.position.pack(width): d.properties.points or 0 for d in board.diamonds}
+    candidates = sorted(
+        (fields.cell(d.position) for d in board.diamonds if near(d.position)),
+        key=lambda cell: fields.dist_cells(root, cell),
+    )[:MAX_CANDIDATES]
+    slot = {cell: number for number, cell in enumerate(candidates)}
+    points = [all_diamonds[cell] for cell in candidates]
+    coords = [divmod(cell, width) for cell in candidates]
+
+    # Opponent paths, and the first move each candidate diamond is gone at
+    taken_at = [horizon + 1] * len(candidates)
+    predictions = []
+    for opponent in board.bots:
+        if opponent.properties.name == properties.name or not near(opponent.position):
+            continue
+        prediction = predict(
+            opponent,
+            models.get(opponent.properties.name, "points"),
+            fields,
+            all_diamonds,
+            root,
+            horizon,
+        )
+        predictions.append(prediction)
+        for step, cell in enumerate(prediction.path[1:], start=1):
+            number = slot.get(cell)
+            picked = prediction.carried[step] > prediction.carried[step - 1]
+            if number is not None and picked and taken_at[number] > step:
+                taken_at[number] = step
+
+    # Candidates not taken by an opponent yet, per depth, as a bitmask
+    standing = [
+        sum(1 << number for number, first_gone in enumerate(taken_at) if first_gone > depth)
+        for depth in range(horizon + 1)
+    ]
+    # Steps from a cell to the closest of a set of candidates, many nodes
+    # share both
+    closest: Dict[Tuple[int, int], int] = {}
+
+    def evaluate(cell: int, carried: int, gained: int, taken: int, depth: int) -> float:
+        value = float(gained)
+        if carried:
+            home_steps = to_home[cell]
+            if 0 <= home_steps <= moves_left - depth:
+                value += CARRY_WEIGHT * carried - RETURN_WEIGHT * carried * home_steps
+        if carried < capacity:
+            left = standing[depth] & ~taken
+            if left:
+                key = (cell, left)
+                steps = closest.get(key)
+                if steps is None:
+                    y, x = divmod(cell, width)
+                    steps = closest[key] = min(
+                        abs(dy - y) + abs(dx - x)
+                        for number, (dy, dx) in enumerate(coords)
+                        if left >> number & 1
+                    )
+                value += SEEK_WEIGHT / (1 + steps)
+        return value
+
+    result = SearchResult()
+    beam: List[Node] = [(root, properties.diamonds or 0, 0, 0, None, 0.0)]
+    nodes = 0
+    for depth in range(1, horizon + 1):
+        children: Dict[Tuple[int, int, int], Node] = {}
+        expired = False
+        for expanded, (cell, carried, gained, taken, first, _) in enumerate(beam, start=1):
+            for move, landing in fields.steps(cell):
+                nodes += 1
+                position, load, score, gone = landing, carried, gained, taken
+
+                for prediction in predictions:
+                    if prediction.path[depth] == position:
+                        if prediction.path[depth - 1] == position:
+                            # Stepped onto a bot that stayed there: tackle
+                            load = min(capacity, load + prediction.carried[depth - 1])
+                        else:
+                            # The opponent stepped onto us
+                            load, position = 0, home
+
+                number = slot.get(position)
+                if (
+                    number is not None
+                    and not gone >> number & 1
+                    and taken_at[number] > depth
+                    and load + points[number] <= capacity
+                ):
+                    load += points[number]
+                    gone |= 1 << number
+                if position == home:
+                    score += load
+                    load = 0
+
+                key = (position, load, gone)
+                value = evaluate(position, load, score, gone, depth)
+                known = children.get(key)
+                if known is None or value > known[5]:
+                    children[key] = (position, load, score, gone, first or move, value)
+
+            if depth > 1 and expanded % DEADLINE_CHECK == 0 and perf_counter() > deadline:
+                expired = True
+                break
+        if expired:
+            break
+
+        beam = nlargest(beam_width, children.values(), key=lambda node: node[5])
+        result.move, result.value, result.depth = beam[0][4], beam[0][5], depth
+        if perf_counter() > deadline:
+            break
+    else:
+        result.complete = True
+
+    result.nodes = nodes
+    result.elapsed = perf_counter() - start
+    return result
+
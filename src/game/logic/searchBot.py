@@ -0,0 +1,69 @@
+from time import perf_counter
+from random import choice
+from game.logic.base import BaseLogic
+from game.logic.search import SearchResult, SearchStats, search
+from game.metrics import Metrics
+from game.models import Board, GameObject, Position
+
+# Looks ahead instead of following fixed rules: every move runs the anytime
+# beam search of game/logic/search.py until a deadline taken from the board's
+# minimum delay between moves, then plays the best first move it found.
+
+class SearchBot(BaseLogic):
+    def __init__(self, budget_fraction: float = 0.4, max_depth: int = 20):
+        # Share of the minimum delay between moves spent searching
+        self.budget_fraction : float = budget_fraction
+        self.max_depth : int = max_depth
+
+        # Opponent models, "chase" or "points", from the last move of each bot
+        self.models : dict[str, str] = {}
+        self.last_positions : dict[str, Position] = {}
+
+        # Metrics
+        self.result : SearchResult = None
+        self.stats : SearchStats = SearchStats()
+
+    # ==================== OPPONENTS ==================== #
+    def updateModels(self, this_bot: GameObject, board: Board) -> None:
+        # A bot that just moved closer to us is treated as a chaser
+        positions = {}
+        for bot in board.bots:
+            name = bot.properties.name
+            positions[name] = bot.position
+            last = self.last_positions.get(name)
+            if name == this_bot.properties.name or last is None or last == bot.position:
+                continue
+            before = abs(last.x - this_bot.position.x) + abs(last.y - this_bot.position.y)
+            after = abs(bot.position.x - this_bot.position.x) + abs(bot.position.y - this_bot.position.y)
+            self.models[name] = "chase" if after < before else "points"
+        self.last_positions = positions
+
+    def deadline(self, board: Board) -> float:
+        return perf_counter() + board.minimum_delay_between_moves * self.budget_fraction / 1000
+
+    # ==================== MAIN FUNCTION ==================== #
+    def next_move(self, this_bot: GameObject, board: Board):
+        deadline = self.deadline(board)
+        self.updateModels(this_bot, board)
+
+        self.result = search(this_bot, board, deadline, self.models, self.max_depth)
+        self.stats.add(self.result)
+        if self.result.move is None:
+            # Nothing left to search, keep moving anywhere valid
+            return choice([move for move, _ in board.distances.steps(board.distances.cell(this_bot.position))])
+        return self.result.move
+
+    # ==================== METRICS ==================== #
+    def report(self, metrics: Metrics) -> None:
+        # Averages per move are the counters divided by search_decisions
+        result = self.result
+        if result is None:
+            return
+        metrics.count("search_decisions")
+        metrics.count("search_nodes", result.nodes)
+        metrics.count("search_depth", result.depth)
+        metrics.count("search_complete", int(result.complete))
+        metrics.observe("search", result.elapsed)
+
+    def summary(self) -> str:
+        return "Search: " + self.stats.summary()
@@ -0,0 +1,185 @@
+import json
+import os
+import threading
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from time import monotonic, perf_counter
+from typing import Dict, Iterator, List, Optional
+
+# Where the time of a tick goes. Every phase (round trip, JSON parse, model
+# parsing, next_move, sleep, ...) is a span recorded into a fixed bucket
+# histogram, next to counters for the moves sent, accepted and invalid. The
+# numbers are exported now and then as Prometheus text and as a JSON summary.
+
+# Upper bounds in seconds, Prometheus style
+BUCKETS = (
+    0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01,
+    0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, float("inf"),
+)
+
+
+def percentile(values: List[float], fraction: float) -> float:
+    # Exact, from every sample, where the samples are kept instead of binned
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+
+@dataclass
+class Histogram:
+    counts: List[int] = field(default_factory=lambda: [0] * len(BUCKETS))
+    count: int = 0
+    total: float = 0.0
+    max: float = 0.0
+
+    def observe(self, seconds: float) -> None:
+        for number, bound in enumerate(BUCKETS):
+            if seconds <= bound:
+                self.counts[number] += 1
+                break
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+
+    def quantile(self, fraction: float) -> float:
+        # Linear inside the bucket holding the quantile, capped by the maximum
+        if not self.count:
+            return 0.0
+        rank = fraction * self.count
+        seen = 0
+        lower = 0.0
+        for bound, count in zip(BUCKETS, self.counts):
+            if count and seen + count >= rank:
+                upper = min(bound, self.max)
+                return lower + (upper - lower) * (rank - seen) / count
+            seen += count
+            lower = bound
+        return self.max
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+
+class Metrics:
+    def __init__(self, move_interval: Optional[float] = None):
+        # Seconds between moves allowed by the board, for moves allowed
+        self.move_interval = move_interval
+        self.spans: Dict[str, Histogram] = {}
+        self.counters: Dict[str, int] = {}
+        self.started = monotonic()
+        self._lock = threading.Lock()
+
+    def start(self, move_interval: float) -> None:
+        # Moves allowed are counted from here
+        self.move_interval = move_interval
+        self.started = monotonic()
+
+    def observe(self, span: str, seconds: float) -> None:
+        with self._lock:
+            histogram = self.spans.get(span)
+            if histogram is None:
+                histogram = self.spans[span] = Histogram()
+            histogram.observe(seconds)
+
+    @contextmanager
+    def span(self, name: str) -> Iterator[None]:
+        start = perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, perf_counter() - start)
+
+    def count(self, counter: str, amount: int = 1) -> None:
+        with self._lock:
+            self.counters[counter] = self.counters.get(counter, 0) + amount
+
+    @property
+    def moves_allowed(self) -> int:
+        if not self.move_interval:
+            return 0
+        return int((monotonic() - self.started) / self.move_interval) + 1
+
+    # ==================== Export ==================== #
+    def summary(self) -> dict:
+        with self._lock:
+            spans = {
+                name: {
+                    "count": histogram.count,
+                    "mean_ms": histogram.mean * 1000,
+                    "p50_ms": histogram.quantile(0.5) * 1000,
+                    "p90_ms": histogram.quantile(0.9) * 1000,
+                    "p99_ms": histogram.quantile(0.99) * 1000,
+                    "max_ms": histogram.max * 1000,
+                    "total_s": histogram.total,
+                }
+                for name, histogram in self.spans.items()
+            }
+            counters = dict(self.counters)
+        allowed = self.moves_allowed
+        accepted = counters.get("moves_accepted", 0)
+        return {
+            "elapsed_s": monotonic() - self.started,
+            "spans": spans,
+            "counters": counters,
+            "moves_allowed": allowed,
+            "move_efficiency": accepted / allowed if allowed else 0.0,
+        }
+
+    def prometheus(self) -> str:
+        lines = [
+            "# HELP diamonds_span_seconds Time spent in each phase of a tick",
+            "# TYPE diamonds_span_seconds histogram",
+        ]
+        with self._lock:
+            for name, histogram in sorted(self.spans.items()):
+                cumulative = 0
+                for bound, count in zip(BUCKETS, histogram.counts):
+                    cumulative += count
+                    le = "+Inf" if bound == float("inf") else repr(bound)
+                    lines.append('diamonds_span_seconds_bucket{{span="{}",le="{}"}} {}'.format(name, le, cumulative))
+                lines.append('diamonds_span_seconds_sum{{span="{}"}} {}'.format(name, histogram.total))
+                lines.append('diamonds_span_seconds_count{{span="{}"}} {}'.format(name, histogram.count))
+            counters = sorted(self.counters.items())
+        lines.append("# HELP diamonds_events_total Moves and requests by outcome, and work counted by the controllers")
+        lines.append("# TYPE diamonds_events_total counter")
+        for name, value in counters:
+            lines.append('diamonds_events_total{{event="{}"}} {}'.format(name, value))
+        lines.append("# HELP diamonds_moves_allowed Moves the board allowed since the start")
+        lines.append("# TYPE diamonds_moves_allowed gauge")
+        lines.append("diamonds_moves_allowed {}".format(self.moves_allowed))
+        return "\n".join(lines) + "\n"
+
+    def export(self, directory: str) -> None:
+        # Written next to the target and renamed, readers never see half a file
+        os.makedirs(directory, exist_ok=True)
+        for name, content in (
+            ("metrics.prom", self.prometheus()),
+            ("metrics.json", json.dumps(self.summary(), indent=2)),
+        ):
+            path = os.path.join(directory, name)
+            with open(path + ".tmp", "w") as f:
+                f.write(content)
+            os.replace(path + ".tmp", path)
+
+
+@dataclass
+class MetricsExporter:
+    metrics: Metrics
+    directory: Optional[str] = None
+    interval: float = 10.0
+    _next_export: float = field(default=0.0, repr=False)
+
+    def maybe_export(self) -> None:
+        # Called once per tick, only touches the disk every interval
+        if self.directory is None:
+            return
+        now = monotonic()
+        if now >= self._next_export:
+            self._next_export = now + self.interval
+            self.metrics.export(self.directory)
+
+    def export(self) -> None:
+        if self.directory is not None:
+            self.metrics.export(self.directory)
@@ -1,26 +1,119 @@
-from dataclasses import dataclass
-from typing import List, Optional, Union
-from colorama import Fore, Style
+from dataclasses import dataclass, field
+from functools import cached_property
+from typing import Dict, List, Optional, Tuple, Union
 
+from game.log import get_logger
 
-@dataclass
+log = get_logger("board")
+
+# A board is parsed into a fresh tree of these every tick, so the small models
+# are slotted. Board itself keeps its __dict__ for the cached lookups below.
+
+
+@dataclass(slots=True)
 class Bot:
     name: str
     email: str
     id: str
 
 
-@dataclass
+@dataclass(frozen=True, slots=True, eq=False)
 class Position:
     y: int
     x: int
 
+    # Equal by coordinates whatever the subclass, a bot's position equals its
+    # base when it is home
+    def __eq__(self, other) -> bool:
+        if isinstance(other, Position):
+            return self.y == other.y and self.x == other.x
+        return NotImplemented
 
-@dataclass
+    def __hash__(self) -> int:
+        return hash((self.y, self.x))
+
+    def pack(self, width: int) -> int:
+        # Cell number on a board of this width
+        return self.y * width + self.x
+
+
+@dataclass(frozen=True, slots=True, eq=False)
 class Base(Position): ...
 
 
-@dataclass
+# Positions are immutable, so equal ones are shared: the parser and the tables
+# below hand out one instance per coordinate
+INTERN_LIMIT = 1 << 16
+_interned: Dict[Tuple[int, int], Position] = {}
+
+
+def intern_position(y: int, x: int) -> Position:
+    position = _interned.get((y, x))
+    if position is None:
+        if len(_interned) >= INTERN_LIMIT:
+            _interned.clear()
+        position = _interned[(y, x)] = Position(y, x)
+    return position
+
+
+class PositionTable:
+    # One interned Position per cell of a board size, by cell number
+    # (y * width + x), so searches can keep plain ints in their sets and dicts
+    # and only turn them back into positions at the end
+    def __init__(self, width: int, height: int):
+        self.width = width
+        self.height = height
+        self.positions = [intern_position(y, x) for y in range(height) for x in range(width)]
+        self._neighbours: List[Optional[Tuple[int, ...]]] = [None] * (width * height)
+
+    def __getitem__(self, cell: int) -> Position:
+        return self.positions[cell]
+
+    def __len__(self) -> int:
+        return len(self.positions)
+
+    def contains(self, x: int, y: int) -> bool:
+        return 0 <= x < self.width and 0 <= y < self.height
+
+    def at(self, x: int, y: int) -> Position:
+        return self.positions[y * self.width + x]
+
+    def pack(self, position: Position) -> int:
+        return position.y * self.width + position.x
+
+    def intern(self, position: Position) -> Position:
+        # The shared instance for the cell, positions off the board are kept
+        if self.contains(position.x, position.y) and type(position) is Position:
+            return self.positions[position.y * self.width + position.x]
+        return position
+
+    def neighbours(self, cell: int) -> Tuple[int, ...]:
+        # Cells one step east, west, south and north that are on the board
+        neighbours = self._neighbours[cell]
+        if neighbours is None:
+            y, x = divmod(cell, self.width)
+            neighbours = self._neighbours[cell] = tuple(
+                ny * self.width + nx
+                for nx, ny in ((x + 1, y), (x - 1, y), (x, y + 1), (x, y - 1))
+                if self.contains(nx, ny)
+            )
+        return neighbours
+
+
+POSITION_TABLE_CACHE_SIZE = 16
+_position_tables: Dict[Tuple[int, int], PositionTable] = {}
+
+
+def position_table(width: int, height: int) -> PositionTable:
+    table = _position_tables.get((width, height))
+    if table is None:
+        if len(_position_tables) >= POSITION_TABLE_CACHE_SIZE:
+            _position_tables.clear()
+        table = _position_tables[(width, height)] = PositionTable(width, height)
+    return table
+
+
+@dataclass(slots=True)
 class Properties:
     points: Optional[int] = None
     pair_id: Optional[str] = None
@@ -34,7 +127,7 @@ class Properties:
     base: Optional[Base] = None
 
 
-@dataclass
+@dataclass(slots=True)
 class GameObject:
     id: int
     position: Position
@@ -42,7 +135,7 @@ class GameObject:
     properties: Optional[Properties] = None
 
 
-@dataclass
+@dataclass(slots=True)
 class Config:
     generation_ratio: Optional[float] = None
     min_ratio_for_generation: Optional[float] = None
@@ -53,12 +146,92 @@ class Config:
     can_tackle: Optional[bool] = None
 
 
-@dataclass
+@dataclass(slots=True)
 class Feature:
     name: str
     config: Optional[Config] = None
 
 
+@dataclass
+class BoardIndex:
+    # Lookup tables over a board snapshot, built in a single pass. The lists are
+    # shared between callers and must not be modified.
+    by_type: Dict[str, List[GameObject]] = field(default_factory=dict)
+    bots_by_name: Dict[str, GameObject] = field(default_factory=dict)
+    bases_by_name: Dict[str, GameObject] = field(default_factory=dict)
+    portals_by_pair: Dict[str, List[GameObject]] = field(default_factory=dict)
+    diamonds_by_points: Dict[int, List[GameObject]] = field(default_factory=dict)
+
+    # Lookup table derived from the objects of each type
+    LOOKUPS = {
+        "DiamondGameObject": "diamonds_by_points",
+        "BotGameObject": "bots_by_name",
+        "BaseGameObject": "bases_by_name",
+        "TeleportGameObject": "portals_by_pair",
+    }
+
+    @classmethod
+    def build(cls, game_objects: List[GameObject]) -> "BoardIndex":
+        index = cls()
+        by_type = index.by_type
+        for game_object in game_objects:
+            objects = by_type.get(game_object.type)
+            if objects is None:
+                objects = by_type[game_object.type] = []
+            objects.append(game_object)
+
+        for object_type, objects in by_type.items():
+            index._add_lookups(object_type, objects)
+        return index
+
+    def _add_lookups(self, object_type: str, objects: List[GameObject]) -> None:
+        if object_type == "DiamondGameObject":
+            for diamond in objects:
+                self.diamonds_by_points.setdefault(diamond.properties.points, []).append(
+                    diamond
+                )
+        elif object_type == "BotGameObject":
+            for bot in objects:
+                self.bots_by_name.setdefault(bot.properties.name, bot)
+        elif object_type == "BaseGameObject":
+            for base in objects:
+                self.bases_by_name.setdefault(base.properties.name, base)
+        elif object_type == "TeleportGameObject":
+            for portal in objects:
+                self.portals_by_pair.setdefault(portal.properties.pair_id, []).append(
+                    portal
+                )
+
+    def patched(self, diff: "BoardDiff") -> Optional["BoardIndex"]:
+        # Index of the next snapshot, rebuilding only the object types the diff
+        # touches. Objects coming or going would change the order of a fresh
+        # build, so those snapshots are left to build their own index.
+        if diff.added or diff.removed:
+            return None
+        if diff.empty:
+            return self
+        replaced = {}
+        for old, new in diff.moved + diff.changed:
+            if old.type != new.type:
+                return None
+            replaced[new.id] = new
+
+        touched = diff.types
+        index = BoardIndex()
+        for object_type, objects in self.by_type.items():
+            lookup = self.LOOKUPS.get(object_type)
+            if object_type in touched:
+                objects = [replaced.get(o.id, o) for o in objects]
+                index._add_lookups(object_type, objects)
+            elif lookup:
+                setattr(index, lookup, getattr(self, lookup))
+            index.by_type[object_type] = objects
+        return index
+
+    def of_type(self, object_type: str) -> List[GameObject]:
+        return self.by_type.get(object_type, [])
+
+
 @dataclass
 class Board:
     id: int
@@ -68,49 +241,94 @@ class Board:
     minimum_delay_between_moves: int
     game_objects: Optional[List[GameObject]]
 
+    @cached_property
+    def index(self) -> BoardIndex:
+        return BoardIndex.build(self.game_objects or [])
+
+    @cached_property
+    def positions(self) -> PositionTable:
+        # Shared between snapshots of the same size
+        return position_table(self.width, self.height)
+
+    @cached_property
+    def grid(self) -> "BoardGrid":
+        # Imported here so numpy is only needed by code that uses the grid
+        from game.grid import BoardGrid
+
+        return BoardGrid(self)
+
+    @cached_property
+    def distances(self) -> "DistanceFields":
+        # Shared between snapshots with the same size and teleporters
+        from game.distance import distance_fields
+
+        return distance_fields(self)
+
+    def carry_over(self, previous: "Board", diff: "BoardDiff") -> None:
+        # Reuse what was computed for the previous snapshot wherever the diff
+        # says nothing relevant changed
+        cached = previous.__dict__
+        if "index" in cached and "index" not in self.__dict__:
+            index = previous.index.patched(diff)
+            if index is not None:
+                self.__dict__["index"] = index
+        if "distances" in cached and not diff.layout_changed:
+            self.__dict__["distances"] = previous.distances
+
     @property
     def bots(self) -> List[GameObject]:
-        return [d for d in self.game_objects if d.type == "BotGameObject"]
+        return self.index.of_type("BotGameObject")
 
     @property
     def diamonds(self) -> List[GameObject]:
-        return [d for d in self.game_objects if d.type == "DiamondGameObject"]
+        return self.index.of_type("DiamondGameObject")
+
+    @property
+    def red_diamonds(self) -> List[GameObject]:
+        return self.index.diamonds_by_points.get(2, [])
+
+    @property
+    def blue_diamonds(self) -> List[GameObject]:
+        return self.index.diamonds_by_points.get(1, [])
+
+    @property
+    def bases(self) -> List[GameObject]:
+        return self.index.of_type("BaseGameObject")
+
+    @property
+    def portals(self) -> List[GameObject]:
+        return self.index.of_type("TeleportGameObject")
+
+    @property
+    def diamond_buttons(self) -> List[GameObject]:
+        return self.index.of_type("DiamondButtonGameObject")
 
     def get_bot(self, bot: Bot) -> Optional[GameObject]:
-        for b in self.bots:
-            if b.properties.name == bot.name:
-                return b
-        return None
+        return self.index.bots_by_name.get(bot.name)
+
+    def get_base(self, name: str) -> Optional[GameObject]:
+        return self.index.bases_by_name.get(name)
+
+    def get_portal_pair(self, pair_id: str) -> List[GameObject]:
+        return self.index.portals_by_pair.get(pair_id, [])
 
     def is_valid_move(
         self, current_position: Position, delta_x: int, delta_y: int
     ) -> bool:
         if not (-1 <= delta_x <= 1) or not (-1 <= delta_y <= 1):
-            print(
-                Fore.RED + Style.BRIGHT + "Invalid move:" + Style.RESET_ALL,
-                "Delta values must be between -1 and 1 inclusive",
-            )
+            log.warning("invalid move", reason="Delta values must be between -1 and 1 inclusive", delta_x=delta_x, delta_y=delta_y)
             return False
 
         if delta_x == delta_y:
-            print(
-                Fore.RED + Style.BRIGHT + "Invalid move:" + Style.RESET_ALL,
-                "Delta_x and delta_y cannot be equal",
-            )
+            log.warning("invalid move", reason="Delta_x and delta_y cannot be equal", delta_x=delta_x, delta_y=delta_y)
             return False
 
         if not (0 <= current_position.x + delta_x < self.width):
-            print(
-                Fore.RED + Style.BRIGHT + "Invalid move:" + Style.RESET_ALL,
-                "X-coordinate out of bounds",
-            )
+            log.warning("invalid move", reason="X-coordinate out of bounds", delta_x=delta_x, delta_y=delta_y)
             return False
 
         if not (0 <= current_position.y + delta_y < self.height):
-            print(
-                Fore.RED + Style.BRIGHT + "Invalid move:" + Style.RESET_ALL,
-                "Y-coordinate out of bounds",
-            )
+            log.warning("invalid move", reason="Y-coordinate out of bounds", delta_x=delta_x, delta_y=delta_y)
             return False
 
         return True
@@ -0,0 +1,130 @@
+import dataclasses
+from typing import Any, Callable, Dict, List, Union, get_args, get_origin, get_type_hints
+
+from dacite.exceptions import DaciteFieldError, MissingValueError, WrongTypeError
+from game.models import Board, Bot, Position, intern_position
+
+# Builds a parser per model class once, at import, straight from the dataclass
+# definitions. The generated functions read the raw camelCase JSON (snake case
+# keys are accepted as well) and construct the model tree in one pass, which
+# gives the same result as decode followed by dacite.from_dict without
+# inspecting type hints on every call.
+
+_MISSING = object()
+
+
+def _camel_case(name: str) -> str:
+    first, *rest = name.split("_")
+    return first + "".join(part.title() for part in rest)
+
+
+def _unwrap_optional(hint) -> tuple:
+    if get_origin(hint) is Union:
+        args = [arg for arg in get_args(hint) if arg is not type(None)]
+        if len(args) == 1 and len(args) != len(get_args(hint)):
+            return args[0], True
+    return hint, False
+
+
+def _converter(hint, namespace: Dict[str, Any], compiled: Dict[type, str]) -> str:
+    # Returns a format string turning "{}" (the raw value) into the parsed value
+    if dataclasses.is_dataclass(hint):
+        return _compile(hint, namespace, compiled) + "({})"
+    if get_origin(hint) in (list, List):
+        (item,) = get_args(hint) or (Any,)
+        item, _ = _unwrap_optional(item)
+        item_converter = _converter(item, namespace, compiled)
+        if item_converter == "{}":
+            return "list({})"
+        return "[" + item_converter.format("_item") + " for _item in {}]"
+    return "{}"
+
+
+def _parse_position(data: dict) -> Position:
+    # Positions are immutable, every object on a cell shares one instance
+    y, x = data.get("y", _MISSING), data.get("x", _MISSING)
+    if y is _MISSING or x is _MISSING:
+        raise MissingValueError("y" if y is _MISSING else "x")
+    if y is None or x is None:
+        raise WrongTypeError(field_path="y" if y is None else "x", field_type=int, value=None)
+    return intern_position(y, x)
+
+
+# Hand written parsers used instead of a generated one
+_CUSTOM = {Position: _parse_position}
+
+
+def _compile(cls: type, namespace: Dict[str, Any], compiled: Dict[type, str]) -> str:
+    if cls in compiled:
+        return compiled[cls]
+    name = "_parse_" + cls.__name__
+    compiled[cls] = name
+    if cls in _CUSTOM:
+        namespace[name] = _CUSTOM[cls]
+        return name
+    namespace[cls.__name__] = cls
+    hints = get_type_hints(cls)
+
+    lines = ["def {}(data):".format(name), "    get = data.get"]
+    arguments = []
+    for index, field in enumerate(dataclasses.fields(cls)):
+        if not field.init:
+            continue
+        hint, optional = _unwrap_optional(hints[field.name])
+        var = "v{}".format(index)
+        camel = _camel_case(field.name)
+        lines.append("    {} = get({!r}, _MISSING)".format(var, camel))
+        if camel != field.name:
+            lines.append("    if {0} is _MISSING: {0} = get({1!r}, _MISSING)".format(var, field.name))
+
+        lines.append("    if {} is _MISSING:".format(var))
+        if field.default is not dataclasses.MISSING:
+            default = "_default_{}_{}".format(cls.__name__, field.name)
+            namespace[default] = field.default
+            lines.append("        {} = {}".format(var, default))
+        elif field.default_factory is not dataclasses.MISSING:
+            default = "_factory_{}_{}".format(cls.__name__, field.name)
+            namespace[default] = field.default_factory
+            lines.append("        {} = {}()".format(var, default))
+        elif optional:
+            lines.append("        {} = None".format(var))
+        else:
+            lines.append("        raise MissingValueError({!r})".format(field.name))
+
+        if not optional:
+            # null is only accepted where the hint is Optional, like dacite
+            field_type = "_type_{}_{}".format(cls.__name__, field.name)
+            namespace[field_type] = hints[field.name]
+            lines.append("    elif {} is None:".format(var))
+            lines.append(
+                "        raise WrongTypeError(field_path={!r}, field_type={}, value=None)".format(field.name, field_type)
+            )
+
+        converter = _converter(hint, namespace, compiled)
+        if converter != "{}":
+            # Errors in nested values name the whole path, like dacite's
+            lines.append("    elif {} is not None:".format(var))
+            lines.append("        try:")
+            lines.append("            {} = {}".format(var, converter.format(var)))
+            lines.append("        except DaciteFieldError as error:")
+            lines.append("            error.update_path({!r})".format(field.name))
+            lines.append("            raise")
+        arguments.append("{}={}".format(field.name, var))
+
+    lines.append("    return {}({})".format(cls.__name__, ", ".join(arguments)))
+    exec("\n".join(lines), namespace)
+    return name
+
+
+def compile_parser(cls: type) -> Callable[[dict], Any]:
+    namespace = {
+        "_MISSING": _MISSING,
+        "MissingValueError": MissingValueError,
+        "DaciteFieldError": DaciteFieldError,
+        "WrongTypeError": WrongTypeError,
+    }
+    return namespace[_compile(cls, namespace, {})]
+
+
+parse_board: Callable[[dict], Board] = compile_parser(Board)
+parse_bot: Callable[[dict], Bot] = compile_parser(Bot)
@@ -0,0 +1,215 @@
+import argparse
+import cProfile
+import io
+import os
+import pstats
+import sys
+import threading
+import tracemalloc
+from contextlib import contextmanager
+from time import sleep
+from typing import Dict, Iterator, List, Optional, Tuple
+
+# Profiles the bots without hand-written timing code. Either only the decision
+# (next_move) or the whole tick is profiled, per controller, with cProfile or
+# with a sampling profiler that reads the profiled threads' stacks every few
+# milliseconds. Decisions made on other threads (an executor, the speculation
+# worker) are profiled on their thread and added to the same controller.
+# cProfile writes a .prof file (snakeviz, flameprof, ...) and the top functions
+# as text, the sampler writes collapsed stacks that flamegraph.pl and
+# speedscope read directly. Every N ticks a tracemalloc snapshot is taken and
+# the biggest allocation sites, and their growth, are written out.
+
+SCOPES = ("decision", "tick")
+MODES = ("cprofile", "sample")
+
+SAMPLE_INTERVAL = 0.001
+TOP_STATS = 30
+
+
+class StackSampler:
+    def __init__(self, interval: float = SAMPLE_INTERVAL):
+        self.interval = interval
+        # Collapsed stack -> samples, per key
+        self.stacks: Dict[str, Dict[str, int]] = {}
+        # Key being sampled, per thread id
+        self._active: Dict[int, str] = {}
+        self._stop = threading.Event()
+        # The profiled thread has to give up the GIL often enough to be sampled
+        self._switch_interval = sys.getswitchinterval()
+        sys.setswitchinterval(min(self._switch_interval, interval))
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+        self._thread.start()
+
+    def begin(self, key: str) -> None:
+        self._active[threading.get_ident()] = key
+
+    def end(self) -> None:
+        self._active.pop(threading.get_ident(), None)
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            sleep(self.interval)
+            active = dict(self._active)
+            if not active:
+                continue
+            frames = sys._current_frames()
+            for thread_id, key in active.items():
+                frame = frames.get(thread_id)
+                names = []
+                while frame is not None:
+                    code = frame.f_code
+                    names.append("{}:{}".format(os.path.basename(code.co_filename), code.co_name))
+                    frame = frame.f_back
+                if names:
+                    stack = ";".join(reversed(names))
+                    counts = self.stacks.setdefault(key, {})
+                    counts[stack] = counts.get(stack, 0) + 1
+
+    def close(self) -> None:
+        self._stop.set()
+        self._thread.join()
+        sys.setswitchinterval(self._switch_interval)
+
+
+class Profiler:
+    def __init__(
+        self,
+        directory: str = "profile",
+        scope: str = "decision",
+        mode: str = "cprofile",
+        snapshot_every: int = 0,
+    ):
+        if scope not in SCOPES:
+            raise ValueError("Invalid profile scope: {}".format(scope))
+        if mode not in MODES:
+            raise ValueError("Invalid profile mode: {}".format(mode))
+        self.directory = directory
+        self.scope = scope
+        self.mode = mode
+        self.snapshot_every = snapshot_every
+        self.ticks = 0
+        # cProfile only sees the thread it is enabled on, one per key and thread
+        self.profiles: Dict[Tuple[str, int], cProfile.Profile] = {}
+        self.sampler = StackSampler() if mode == "sample" else None
+        self._tick_key: Optional[str] = None
+        self._tick_thread: Optional[int] = None
+        self._previous_snapshot: Optional[tracemalloc.Snapshot] = None
+        os.makedirs(directory, exist_ok=True)
+        if snapshot_every:
+            tracemalloc.start()
+
+    # ==================== Sections ==================== #
+    def _begin(self, key: str) -> None:
+        if self.sampler:
+            self.sampler.begin(key)
+        else:
+            section = (key, threading.get_ident())
+            profile = self.profiles.get(section)
+            if profile is None:
+                profile = self.profiles[section] = cProfile.Profile()
+            profile.enable()
+
+    def _end(self, key: str) -> None:
+        if self.sampler:
+            self.sampler.end()
+        else:
+            self.profiles[(key, threading.get_ident())].disable()
+
+    @contextmanager
+    def decision(self, key: str) -> Iterator[None]:
+        # Around next_move, does nothing when whole ticks are profiled
+        if self.scope != "decision":
+            yield
+            return
+        self._begin(key)
+        try:
+            yield
+        finally:
+            self._end(key)
+
+    def call(self, key: str, func, *args):
+        # decision() for a call that may run on another thread, e.g. an
+        # executor. With whole ticks profiled a call on another thread than
+        # the ticking one is added to the tick, which is waiting on it.
+        if self.scope == "tick":
+            tick_key = self._tick_key
+            if tick_key is None or threading.get_ident() == self._tick_thread:
+                return func(*args)
+            self._begin(tick_key)
+            try:
+                return func(*args)
+            finally:
+                self._end(tick_key)
+        with self.decision(key):
+            return func(*args)
+
+    def tick(self, key: str) -> None:
+        # Called at the top of every tick, a tick runs until the next call
+        if self.scope == "tick":
+            if self._tick_key is not None:
+                self._end(self._tick_key)
+            self._tick_key = key
+            self._tick_thread = threading.get_ident()
+            self._begin(key)
+        self.ticks += 1
+        if self.snapshot_every and self.ticks % self.snapshot_every == 0:
+            self.snapshot()
+
+    # ==================== Output ==================== #
+    def snapshot(self) -> None:
+        snapshot = tracemalloc.take_snapshot().filter_traces(
+            (tracemalloc.Filter(False, tracemalloc.__file__), tracemalloc.Filter(False, __file__))
+        )
+        lines = ["Allocations at tick {}".format(self.ticks), ""]
+        lines += [str(stat) for stat in snapshot.statistics("lineno")[:TOP_STATS]]
+        if self._previous_snapshot is not None:
+            lines += ["", "Growth since the previous snapshot", ""]
+            lines += [str(stat) for stat in snapshot.compare_to(self._previous_snapshot, "lineno")[:TOP_STATS]]
+        self._previous_snapshot = snapshot
+        with open(os.path.join(self.directory, "alloc_{:06d}.txt".format(self.ticks)), "w") as f:
+            f.write("\n".join(lines) + "\n")
+
+    def close(self) -> None:
+        if self._tick_key is not None:
+            self._end(self._tick_key)
+            self._tick_key = None
+        if self.sampler:
+            self.sampler.close()
+            for key, stacks in self.sampler.stacks.items():
+                with open(os.path.join(self.directory, "{}.collapsed".format(key)), "w") as f:
+                    for stack, count in sorted(stacks.items()):
+                        f.write("{} {}\n".format(stack, count))
+        by_key: Dict[str, List[cProfile.Profile]] = {}
+        for (key, _), profile in self.profiles.items():
+            by_key.setdefault(key, []).append(profile)
+        for key, profiles in by_key.items():
+            text = io.StringIO()
+            stats = pstats.Stats(*profiles, stream=text)
+            stats.dump_stats(os.path.join(self.directory, "{}.prof".format(key)))
+            stats.sort_stats("cumulative").print_stats(TOP_STATS)
+            with open(os.path.join(self.directory, "{}.txt".format(key)), "w") as f:
+                f.write(text.getvalue())
+        if self.snapshot_every:
+            tracemalloc.stop()
+
+
+def add_arguments(parser: argparse.ArgumentParser) -> None:
+    group = parser.add_argument_group("Profiling")
+    group.add_argument(
+        "--profile",
+        help="Profile every controller's decisions or whole ticks. Valid options are: {}".format(", ".join(SCOPES)),
+        choices=SCOPES,
+        action="store",
+    )
+    group.add_argument("--profile-mode", default="cprofile", choices=MODES, action="store")
+    group.add_argument("--profile-dir", help="Where profiles are written", default="profile", action="store")
+    group.add_argument(
+        "--snapshot-every", help="Write a tracemalloc snapshot every N ticks", default=0, type=int, action="store"
+    )
+
+
+def from_arguments(args: argparse.Namespace) -> Optional[Profiler]:
+    if not args.profile:
+        return None
+    return Profiler(args.profile_dir, args.profile, args.profile_mode, args.snapshot_every)
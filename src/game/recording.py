@@ -0,0 +1,225 @@
+import json
+import struct
+from dataclasses import asdict
+from time import perf_counter
+from typing import BinaryIO, Dict, Optional, Tuple
+
+from game.models import Board, GameObject
+
+# Compact binary log of the boards a bot received. The static layout is
+# written once, afterwards every tick only holds the objects that were added,
+# changed or removed, as fixed width records (a short one when an object only
+# moved, which is most of them). Strings (names, object types,
+# teleporter pairs, join times) go to a string table the first time they are
+# seen and are referred to by index.
+#
+# The file is a header followed by frames: kind (u8), payload length (u32),
+# payload. Bots' milliseconds left are stored as an end time on a clock that
+# is rebuilt from the boards themselves, so a bot's record only changes when
+# it moves, picks up or scores, and replays get the exact values back.
+#
+# Objects keep the order they first appeared in. When a board lists them in
+# another order (the server regenerated diamonds or moved teleporters) the
+# tick ends with the whole order, so replays get the exact list back.
+
+MAGIC = b"DIAREC\x00\x01"
+
+# Frame kinds
+LAYOUT = 1
+STRING = 2
+TYPE = 3
+BOT_INFO = 4
+TICK = 5
+MOVES = 6
+
+FRAME = struct.Struct("<BI")
+# Board id, width, height, minimum delay, followed by the features as JSON
+LAYOUT_HEAD = struct.Struct("<iHHi")
+# Index, followed by the UTF-8 text
+STRING_HEAD = struct.Struct("<I")
+TYPE_HEAD = struct.Struct("<B")
+# Bot id, name, base x, base y, inventory size, can tackle, time joined
+BOT = struct.Struct("<IIhhhbI")
+# Tick number, clock (ms), seconds since the recording started, object records
+TICK_HEAD = struct.Struct("<IqfH")
+# Op, object id, type, x, y, and three values depending on the type
+OBJECT = struct.Struct("<BIBHHhii")
+# Op, object id, x, y
+POSITION = struct.Struct("<BIHH")
+# Op, object id
+REMOVED = struct.Struct("<BI")
+# Op, number of objects, followed by every object id (u32) in board order
+ORDER_HEAD = struct.Struct("<BI")
+# Bot id, dx, dy
+MOVE = struct.Struct("<Ibb")
+
+SET = 1
+REMOVE = 2
+MOVE_TO = 3
+ORDER = 4
+
+# Size of a record by its op, records start with the op. ORDER records are
+# ORDER_HEAD.size plus 4 bytes per object.
+RECORD_SIZES = {SET: OBJECT.size, REMOVE: REMOVED.size, MOVE_TO: POSITION.size}
+
+# Stored for properties that are None
+NONE16 = -(2**15)
+NONE32 = -(2**31)
+NO_STRING = 2**31 - 1
+
+BUFFER_SIZE = 1 << 16
+
+
+def _int16(value: Optional[int]) -> int:
+    return NONE16 if value is None else value
+
+
+def _int32(value: Optional[int]) -> int:
+    return NONE32 if value is None else value
+
+
+class GameRecorder:
+    def __init__(self, path: str):
+        # One game per file, an existing file is replaced
+        self.path = path
+        self._file: BinaryIO = open(path, "wb", buffering=BUFFER_SIZE)
+        self._file.write(MAGIC)
+        self._strings: Dict[str, int] = {}
+        self._types: Dict[str, int] = {}
+        self._bots: Dict[int, tuple] = {}
+        self._objects: Dict[int, tuple] = {}
+        self._layout: Optional[tuple] = None
+        self._clock = 0
+        self._ends_at: Dict[int, int] = {}
+        self._started = perf_counter()
+        self.ticks = 0
+        self.bytes = len(MAGIC)
+
+    # ==================== Frames ==================== #
+    def _frame(self, kind: int, payload: bytes) -> None:
+        self._file.write(FRAME.pack(kind, len(payload)))
+        self._file.write(payload)
+        self.bytes += FRAME.size + len(payload)
+
+    def _string(self, text: Optional[str]) -> int:
+        if text is None:
+            return NO_STRING
+        index = self._strings.get(text)
+        if index is None:
+            index = self._strings[text] = len(self._strings)
+            self._frame(STRING, STRING_HEAD.pack(index) + text.encode())
+        return index
+
+    def _type(self, name: str) -> int:
+        code = self._types.get(name)
+        if code is None:
+            code = self._types[name] = len(self._types)
+            self._frame(TYPE, TYPE_HEAD.pack(code) + name.encode())
+        return code
+
+    def _write_layout(self, board: Board) -> None:
+        features = json.dumps([asdict(feature) for feature in board.features or []])
+        layout = (board.id, board.width, board.height, board.minimum_delay_between_moves, features)
+        if layout != self._layout:
+            self._layout = layout
+            head = LAYOUT_HEAD.pack(board.id, board.width, board.height, board.minimum_delay_between_moves)
+            self._frame(LAYOUT, head + features.encode())
+
+    def _write_bot_info(self, bot: GameObject) -> None:
+        properties = bot.properties
+        base = properties.base
+        info = BOT.pack(
+            bot.id,
+            self._string(properties.name),
+            base.x if base else NONE16,
+            base.y if base else NONE16,
+            _int16(properties.inventory_size),
+            -1 if properties.can_tackle is None else int(properties.can_tackle),
+            self._string(properties.time_joined),
+        )
+        if self._bots.get(bot.id) != info:
+            self._bots[bot.id] = info
+            self._frame(BOT_INFO, info)
+
+    # ==================== Ticks ==================== #
+    def _update_clock(self, board: Board) -> None:
+        # Every milliseconds_left of one board counts down from the same server
+        # time, a bot seen before gives that time back on our clock
+        for bot in board.bots:
+            ends_at = self._ends_at.get(bot.id)
+            left = bot.properties.milliseconds_left
+            if ends_at is not None and left:
+                self._clock = ends_at - left
+                return
+
+    def _values(self, game_object: GameObject) -> Tuple[int, int, int]:
+        properties = game_object.properties
+        if properties is None:
+            return 0, 0, 0
+        kind = game_object.type
+        if kind == "BotGameObject":
+            left = properties.milliseconds_left
+            ends_at = NONE32 if left is None else self._clock + left
+            if left is not None:
+                self._ends_at[game_object.id] = ends_at
+            return _int16(properties.diamonds), _int32(properties.score), ends_at
+        if kind == "DiamondGameObject":
+            return _int16(properties.points), 0, 0
+        if kind == "TeleportGameObject":
+            return 0, self._string(properties.pair_id), 0
+        if kind == "BaseGameObject":
+            return 0, self._string(properties.name), 0
+        return 0, 0, 0
+
+    def record(self, board: Board) -> None:
+        self._write_layout(board)
+        self._update_clock(board)
+
+        records = []
+        seen = set()
+        order = []
+        for game_object in board.game_objects or []:
+            seen.add(game_object.id)
+            order.append(game_object.id)
+            if game_object.type == "BotGameObject":
+                self._write_bot_info(game_object)
+            state = (
+                self._type(game_object.type),
+                game_object.position.x,
+                game_object.position.y,
+                *self._values(game_object),
+            )
+            previous = self._objects.get(game_object.id)
+            if previous != state:
+                self._objects[game_object.id] = state
+                if previous is not None and previous[0] == state[0] and previous[3:] == state[3:]:
+                    records.append(POSITION.pack(MOVE_TO, game_object.id, state[1], state[2]))
+                else:
+                    records.append(OBJECT.pack(SET, game_object.id, *state))
+        for object_id in [object_id for object_id in self._objects if object_id not in seen]:
+            del self._objects[object_id]
+            self._ends_at.pop(object_id, None)
+            records.append(REMOVED.pack(REMOVE, object_id))
+        if list(self._objects) != order:
+            # New objects go last and removed ones leave no gap, anything
+            # else the board reordered
+            self._objects = {object_id: self._objects[object_id] for object_id in order}
+            records.append(ORDER_HEAD.pack(ORDER, len(order)) + struct.pack("<{}I".format(len(order)), *order))
+
+        head = TICK_HEAD.pack(self.ticks, self._clock, perf_counter() - self._started, len(records))
+        self._frame(TICK, head + b"".join(records))
+        self.ticks += 1
+
+    def record_moves(self, moves: Dict[int, Tuple[int, int]]) -> None:
+        # Moves the bots played on the last recorded board, by bot id
+        if moves:
+            self._frame(MOVES, b"".join(MOVE.pack(bot_id, dx, dy) for bot_id, (dx, dy) in moves.items()))
+
+    def close(self) -> None:
+        self._file.close()
+
+    def __enter__(self) -> "GameRecorder":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
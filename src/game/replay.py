@@ -0,0 +1,309 @@
+import json
+import mmap
+import struct
+from array import array
+from dataclasses import dataclass
+from functools import cached_property
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from game.models import (
+    Base,
+    Board,
+    Config,
+    Feature,
+    GameObject,
+    Position,
+    PositionTable,
+    Properties,
+    position_table,
+)
+from game.recording import (
+    BOT,
+    BOT_INFO,
+    FRAME,
+    LAYOUT,
+    LAYOUT_HEAD,
+    MAGIC,
+    MOVE,
+    MOVE_TO,
+    MOVES,
+    NO_STRING,
+    ORDER,
+    ORDER_HEAD,
+    NONE16,
+    NONE32,
+    OBJECT,
+    POSITION,
+    RECORD_SIZES,
+    REMOVE,
+    REMOVED,
+    SET,
+    STRING,
+    STRING_HEAD,
+    TICK,
+    TICK_HEAD,
+    TYPE,
+    TYPE_HEAD,
+)
+
+# Reads the logs written by GameRecorder. The file is memory mapped and a
+# single pass over the frame headers at open builds the index: the offset of
+# every tick and of its moves, plus a copy of the object table every
+# CHECKPOINT_EVERY ticks. A board is only built when asked for, from the
+# nearest checkpoint (or from the last board built, when reading forward) and
+# at most CHECKPOINT_EVERY ticks of records read in place from the map.
+
+CHECKPOINT_EVERY = 64
+
+
+def _optional(value: int, none: int) -> Optional[int]:
+    return None if value == none else value
+
+
+@dataclass
+class ReplayTick:
+    replay: "Replay"
+    number: int
+    # Clock (ms) the bots' milliseconds left count down on
+    clock: int
+    # Seconds between the start of the recording and this board
+    seconds: float
+
+    @cached_property
+    def moves(self) -> Dict[int, Tuple[int, int]]:
+        # Moves played on this board, by bot id
+        return self.replay.moves(self.number)
+
+    @cached_property
+    def board(self) -> Board:
+        return self.replay.board(self.number)
+
+
+class Replay:
+    def __init__(self, path: str, checkpoint_every: int = CHECKPOINT_EVERY):
+        self.path = path
+        self.checkpoint_every = checkpoint_every
+        self.strings: Dict[int, str] = {}
+        self.types: Dict[int, str] = {}
+        # (first tick, value) in file order, usually a single entry
+        self._layouts: List[Tuple[int, tuple]] = []
+        self._bot_infos: Dict[int, List[Tuple[int, tuple]]] = {}
+        # Offset of every tick frame's payload, and of its moves frame (0: none)
+        self._ticks = array("Q")
+        self._moves = array("Q")
+        # Object tables before ticks 0, N, 2N, ... object id -> record values
+        self._checkpoints: List[Dict[int, tuple]] = []
+        # Object table after the last tick built, for reading forward
+        self._cursor: Optional[Tuple[int, Dict[int, tuple]]] = None
+
+        self._file = open(path, "rb")
+        try:
+            self._data = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            self._file.close()
+            raise ValueError("Not a game recording: {}".format(path))
+        if self._data[: len(MAGIC)] != MAGIC:
+            self.close()
+            raise ValueError("Not a game recording: {}".format(path))
+        self._build_index()
+
+    # ==================== Index ==================== #
+    def _build_index(self) -> None:
+        data = self._data
+        size = len(data)
+        offset = len(MAGIC)
+        objects: Dict[int, tuple] = {}
+        while offset + FRAME.size <= size:
+            kind, length = FRAME.unpack_from(data, offset)
+            payload = offset + FRAME.size
+            if payload + length > size:
+                # Cut short, e.g. the bot was killed before the buffer was written
+                break
+            tick = len(self._ticks)
+            if kind == TICK:
+                if tick % self.checkpoint_every == 0:
+                    self._checkpoints.append(dict(objects))
+                self._ticks.append(payload)
+                self._moves.append(0)
+                self._apply(objects, payload)
+            elif kind == MOVES and tick:
+                self._moves[tick - 1] = offset
+            elif kind == STRING:
+                (index,) = STRING_HEAD.unpack_from(data, payload)
+                start = payload + STRING_HEAD.size
+                self.strings[index] = data[start : payload + length].decode()
+            elif kind == TYPE:
+                (code,) = TYPE_HEAD.unpack_from(data, payload)
+                start = payload + TYPE_HEAD.size
+                self.types[code] = data[start : payload + length].decode()
+            elif kind == BOT_INFO:
+                info = BOT.unpack_from(data, payload)
+                self._bot_infos.setdefault(info[0], []).append((tick, info))
+            elif kind == LAYOUT:
+                head = LAYOUT_HEAD.unpack_from(data, payload)
+                start = payload + LAYOUT_HEAD.size
+                features = [
+                    Feature(feature["name"], Config(**feature["config"]) if feature["config"] else None)
+                    for feature in json.loads(data[start : payload + length].decode())
+                ]
+                self._layouts.append((tick, (*head, features)))
+            offset = payload + length
+
+    def _apply(self, objects: Dict[int, tuple], payload: int) -> None:
+        # Applies the records of the tick frame at payload to the object table
+        data = self._data
+        count = TICK_HEAD.unpack_from(data, payload)[3]
+        offset = payload + TICK_HEAD.size
+        for _ in range(count):
+            op = data[offset]
+            if op == MOVE_TO:
+                _, object_id, x, y = POSITION.unpack_from(data, offset)
+                state = objects[object_id]
+                objects[object_id] = (state[0], x, y) + state[3:]
+            elif op == SET:
+                values = OBJECT.unpack_from(data, offset)
+                objects[values[1]] = values[2:]
+            elif op == REMOVE:
+                objects.pop(REMOVED.unpack_from(data, offset)[1], None)
+            elif op == ORDER:
+                # The table is shared with the caller, it is reordered in place
+                length = ORDER_HEAD.unpack_from(data, offset)[1]
+                offset += ORDER_HEAD.size
+                order = struct.unpack_from("<{}I".format(length), data, offset)
+                reordered = {object_id: objects[object_id] for object_id in order}
+                objects.clear()
+                objects.update(reordered)
+                offset += 4 * length
+                continue
+            else:
+                raise ValueError("Unknown record {} at offset {} of {}".format(op, offset, self.path))
+            offset += RECORD_SIZES[op]
+
+    def _objects(self, number: int) -> Dict[int, tuple]:
+        # Object table after the records of tick number
+        if not 0 <= number < len(self._ticks):
+            raise IndexError("Tick {} not in recording of {} ticks".format(number, len(self._ticks)))
+        start = number - number % self.checkpoint_every
+        cursor = self._cursor
+        if cursor is not None and start <= cursor[0] <= number:
+            start, objects = cursor[0] + 1, cursor[1]
+        else:
+            objects = dict(self._checkpoints[number // self.checkpoint_every])
+        for tick in range(start, number + 1):
+            self._apply(objects, self._ticks[tick])
+        self._cursor = (number, objects)
+        return objects
+
+    @staticmethod
+    def _at(history: List[Tuple[int, tuple]], number: int) -> Optional[tuple]:
+        current = None
+        for first, value in history:
+            if first > number:
+                break
+            current = value
+        return current
+
+    # ==================== Ticks ==================== #
+    def __len__(self) -> int:
+        return len(self._ticks)
+
+    def tick(self, number: int) -> ReplayTick:
+        if not 0 <= number < len(self._ticks):
+            raise IndexError("Tick {} not in recording of {} ticks".format(number, len(self._ticks)))
+        _, clock, seconds, _ = TICK_HEAD.unpack_from(self._data, self._ticks[number])
+        return ReplayTick(self, number, clock, seconds)
+
+    def __iter__(self) -> Iterator[ReplayTick]:
+        for number in range(len(self._ticks)):
+            yield self.tick(number)
+
+    def moves(self, number: int) -> Dict[int, Tuple[int, int]]:
+        offset = self._moves[number]
+        if not offset:
+            return {}
+        _, length = FRAME.unpack_from(self._data, offset)
+        moves = {}
+        for start in range(offset + FRAME.size, offset + FRAME.size + length, MOVE.size):
+            bot_id, dx, dy = MOVE.unpack_from(self._data, start)
+            moves[bot_id] = (dx, dy)
+        return moves
+
+    def played_by(self) -> Dict[int, int]:
+        # Moves recorded per bot id over the whole game
+        counts: Dict[int, int] = {}
+        for offset in self._moves:
+            if offset:
+                _, length = FRAME.unpack_from(self._data, offset)
+                for start in range(offset + FRAME.size, offset + FRAME.size + length, MOVE.size):
+                    bot_id = MOVE.unpack_from(self._data, start)[0]
+                    counts[bot_id] = counts.get(bot_id, 0) + 1
+        return counts
+
+    # ==================== Boards ==================== #
+    def _string(self, index: int) -> Optional[str]:
+        return None if index == NO_STRING else self.strings.get(index)
+
+    def _game_object(
+        self, number: int, object_id: int, state: tuple, clock: int, positions: PositionTable
+    ) -> GameObject:
+        code, x, y, first, second, third = state
+        kind = self.types[code]
+        if kind == "BotGameObject":
+            properties = Properties(
+                diamonds=_optional(first, NONE16),
+                score=_optional(second, NONE32),
+                milliseconds_left=None if third == NONE32 else third - clock,
+            )
+            info = self._at(self._bot_infos.get(object_id, []), number)
+            if info is not None:
+                _, name, base_x, base_y, inventory_size, can_tackle, time_joined = info
+                properties.name = self._string(name)
+                properties.inventory_size = _optional(inventory_size, NONE16)
+                properties.can_tackle = None if can_tackle < 0 else bool(can_tackle)
+                properties.time_joined = self._string(time_joined)
+                if base_x != NONE16:
+                    properties.base = Base(y=base_y, x=base_x)
+        elif kind == "DiamondGameObject":
+            properties = Properties(points=_optional(first, NONE16))
+        elif kind == "TeleportGameObject":
+            properties = Properties(pair_id=self._string(second))
+        elif kind == "BaseGameObject":
+            properties = Properties(name=self._string(second))
+        else:
+            properties = Properties()
+        position = positions.at(x, y) if positions.contains(x, y) else Position(y=y, x=x)
+        return GameObject(object_id, position, kind, properties)
+
+    def board(self, number: int) -> Board:
+        # Objects come in the order of the recorded board
+        objects = self._objects(number)
+        clock = TICK_HEAD.unpack_from(self._data, self._ticks[number])[1]
+        board_id, width, height, minimum_delay, features = self._at(self._layouts, number)
+        positions = position_table(width, height)
+        return Board(
+            board_id,
+            width,
+            height,
+            features,
+            minimum_delay,
+            [self._game_object(number, object_id, state, clock, positions) for object_id, state in objects.items()],
+        )
+
+    def close(self) -> None:
+        self._cursor = None
+        self._checkpoints = []
+        self._data.close()
+        self._file.close()
+
+    def __enter__(self) -> "Replay":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+def recordings(paths: Iterable[str]) -> Iterator[Replay]:
+    # One recording open at a time, each is closed before the next is opened
+    for path in paths:
+        with Replay(path) as replay:
+            yield replay
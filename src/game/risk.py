@@ -0,0 +1,180 @@
+import copy
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Deque, Dict, Optional, Tuple
+
+import numpy as np
+
+from game.models import Board, GameObject, Position
+
+# Where the other bots are likely to be over the next few moves, and from that
+# the chance of being tackled on every cell. Each bot's recent moves give the
+# odds of its next direction (or of staying), which are spread over a small
+# window around it for `horizon` moves. The board wide map keeps the sum of
+# log(chance of not being entered) of every bot, so a tick only redoes the
+# windows of the bots that moved or changed behaviour. Teleporters and the
+# board edges are ignored by the spread, the map is a cheap estimate.
+
+# Stay, east, west, south, north, same order as MOVES
+MOVES = ((0, 0), (1, 0), (-1, 0), (0, 1), (0, -1))
+
+# Chances of 1 would make the log map infinite
+MAX_CHANCE = 0.999
+
+# Windows only depend on the move chances, which take few distinct values
+CONTRIBUTION_CACHE_SIZE = 256
+
+
+@dataclass
+class Track:
+    name: str
+    position: Position
+    moves: Deque[int] = field(default_factory=deque)
+    # Window of the last contribution to the log map
+    window: Optional[Tuple[int, int, int, int]] = None
+    contribution: Optional[np.ndarray] = None
+    key: Optional[Tuple] = None
+
+
+class OpponentTracker:
+    def __init__(self, horizon: int = 3, history: int = 8, smoothing: float = 1.0):
+        self.horizon = horizon
+        self.history = history
+        self.smoothing = smoothing
+        self.tracks: Dict[str, Track] = {}
+        self.log_survival: Optional[np.ndarray] = None
+        self._risk: Optional[np.ndarray] = None
+        self._contributions: Dict[Tuple, np.ndarray] = {}
+
+    def __deepcopy__(self, memo: dict) -> "OpponentTracker":
+        # Copies share the contribution cache, its arrays are never modified
+        memo[id(self._contributions)] = self._contributions
+        clone = OpponentTracker.__new__(OpponentTracker)
+        memo[id(self)] = clone
+        for name, value in self.__dict__.items():
+            setattr(clone, name, copy.deepcopy(value, memo))
+        return clone
+
+    # ==================== Tracking ==================== #
+    def update(self, board: Board, this_bot: GameObject) -> None:
+        shape = (board.height, board.width)
+        if self.log_survival is None or self.log_survival.shape != shape:
+            self.log_survival = np.zeros(shape)
+            for track in self.tracks.values():
+                track.window = track.contribution = track.key = None
+
+        seen = set()
+        for bot in board.bots:
+            name = bot.properties.name
+            if name == this_bot.properties.name or bot.properties.can_tackle is False:
+                continue
+            seen.add(name)
+            track = self.tracks.get(name)
+            if track is None:
+                track = self.tracks[name] = Track(name, bot.position)
+            else:
+                self._observe(track, bot.position)
+            self._refresh(track, shape)
+
+        for name in [name for name in self.tracks if name not in seen]:
+            self._remove(self.tracks.pop(name))
+
+    def _observe(self, track: Track, position: Position) -> None:
+        step = (position.x - track.position.x, position.y - track.position.y)
+        track.position = position
+        # Teleports and tackles are jumps, not moves
+        if step in MOVES:
+            track.moves.append(MOVES.index(step))
+            if len(track.moves) > self.history:
+                track.moves.popleft()
+
+    def chances(self, name: str) -> np.ndarray:
+        # Chance of each of MOVES as the bot's next move
+        counts = np.full(len(MOVES), self.smoothing)
+        track = self.tracks.get(name)
+        if track:
+            for move in track.moves:
+                counts[move] += 1
+        return counts / counts.sum()
+
+    def stay_chance(self, bot: GameObject) -> float:
+        return float(self.chances(bot.properties.name)[0])
+
+    # ==================== Prediction ==================== #
+    def occupancy(self, chances: np.ndarray) -> np.ndarray:
+        # Chance of the bot being on each cell of a window centred on it after
+        # every move, shape (horizon, 2 * horizon + 1, 2 * horizon + 1)
+        size = 2 * self.horizon + 1
+        current = np.zeros((size, size))
+        current[self.horizon, self.horizon] = 1.0
+        steps = np.empty((self.horizon, size, size))
+        for step in range(self.horizon):
+            spread = current * chances[0]
+            for chance, (dx, dy) in zip(chances[1:], MOVES[1:]):
+                spread += chance * np.roll(current, (dy, dx), axis=(0, 1))
+            steps[step] = current = spread
+        return steps
+
+    def contribution(self, chances: np.ndarray) -> np.ndarray:
+        # log(chance of the bot not entering a cell) over the next moves, its
+        # current cell is left out since stepping onto it is our tackle
+        key = tuple(np.round(chances, 6))
+        contribution = self._contributions.get(key)
+        if contribution is None:
+            entered = np.minimum(self.occupancy(chances), MAX_CHANCE)
+            contribution = np.log1p(-entered).sum(axis=0)
+            contribution[self.horizon, self.horizon] = 0.0
+            if len(self._contributions) >= CONTRIBUTION_CACHE_SIZE:
+                self._contributions.clear()
+            self._contributions[key] = contribution
+        return contribution
+
+    def _refresh(self, track: Track, shape: Tuple[int, int]) -> None:
+        chances = self.chances(track.name)
+        key = (track.position.x, track.position.y, tuple(np.round(chances, 6)))
+        if key == track.key:
+            return
+        self._remove(track)
+        contribution = self.contribution(chances)
+
+        # Clip the window to the board
+        height, width = shape
+        x, y = track.position.x, track.position.y
+        top, left = y - self.horizon, x - self.horizon
+        y0, x0 = max(0, top), max(0, left)
+        y1 = min(height, y + self.horizon + 1)
+        x1 = min(width, x + self.horizon + 1)
+        if y0 >= y1 or x0 >= x1:
+            return
+        track.window = (y0, y1, x0, x1)
+        track.contribution = contribution[y0 - top : y1 - top, x0 - left : x1 - left]
+        track.key = key
+        self.log_survival[y0:y1, x0:x1] += track.contribution
+        self._risk = None
+
+    def _remove(self, track: Track) -> None:
+        if track.window is not None and self.log_survival is not None:
+            y0, y1, x0, x1 = track.window
+            region = self.log_survival[y0:y1, x0:x1]
+            region -= track.contribution
+            # Keep rounding errors from leaving positive logs behind
+            np.minimum(region, 0.0, out=region)
+            self._risk = None
+        track.window = track.contribution = track.key = None
+
+    # ==================== Risk ==================== #
+    @property
+    def risk(self) -> np.ndarray:
+        # Chance of being tackled on each cell within the horizon, [y, x]
+        if self._risk is None:
+            if self.log_survival is None:
+                return np.zeros((0, 0))
+            self._risk = 1.0 - np.exp(self.log_survival)
+        return self._risk
+
+    def risk_at(self, position: Position) -> float:
+        risk = self.risk
+        if 0 <= position.y < risk.shape[0] and 0 <= position.x < risk.shape[1]:
+            return float(risk[position.y, position.x])
+        return 0.0
+
@@ -0,0 +1,85 @@
+from dataclasses import dataclass, field
+from time import monotonic
+from typing import Optional
+
+
+@dataclass
+class MoveScheduler:
+    # Paces moves on the monotonic clock so every move reaches the server right
+    # after the previous one is allowed, instead of sleeping a fixed time after
+    # the request and the decision have already been paid for.
+    interval: float
+    margin: float = 0.002
+    smoothing: float = 0.125
+    backoff: float = 0.005
+
+    moves: int = 0
+    rejected: int = 0
+    missed_slots: int = 0
+    rtt: float = 0.0
+    rtt_deviation: float = 0.0
+    penalty: float = 0.0
+
+    _sent_at: Optional[float] = field(default=None, repr=False)
+    _next_move_at: Optional[float] = field(default=None, repr=False)
+
+    def time_until_next_move(self) -> float:
+        if self._next_move_at is None:
+            return 0.0
+        return max(0.0, self._next_move_at - monotonic())
+
+    def move_sent(self) -> None:
+        now = monotonic()
+        if self._next_move_at is not None:
+            late = now - self._next_move_at
+            if late >= self.interval:
+                self.missed_slots += int(late // self.interval)
+        self._sent_at = now
+
+    def move_skipped(self) -> None:
+        # No move was sent in this slot, e.g. the board was refreshed instead,
+        # the next move is still paced one interval later
+        self._next_move_at = monotonic() + self.interval
+        self._sent_at = None
+
+    def move_done(self, accepted: bool) -> None:
+        if self._sent_at is None:
+            return
+        now = monotonic()
+        sample = now - self._sent_at
+
+        # Smoothed round trip and its deviation, same estimator as TCP's RTO
+        if self.moves == 0 and self.rejected == 0:
+            self.rtt = sample
+            self.rtt_deviation = sample / 2
+        else:
+            self.rtt_deviation += self.smoothing * (
+                abs(sample - self.rtt) - self.rtt_deviation
+            )
+            self.rtt += self.smoothing * (sample - self.rtt)
+
+        if accepted:
+            self.moves += 1
+            self.penalty *= 0.9
+        else:
+            # Most likely too early, give the server a bit more room next time
+            self.rejected += 1
+            self.penalty += self.backoff
+
+        # The move reached the server about half a round trip after it was sent,
+        # the next one should arrive one interval later than that
+        reached_server_at = self._sent_at + sample / 2
+        self._next_move_at = (
+            reached_server_at
+            + self.interval
+            - self.rtt / 2
+            + self.rtt_deviation
+            + self.margin
+            + self.penalty
+        )
+        self._sent_at = None
+
+    def summary(self) -> str:
+        return "Moves: {}, rejected: {}, missed slots: {}, average round trip: {:.1f} ms".format(
+            self.moves, self.rejected, self.missed_slots, self.rtt * 1000
+        )
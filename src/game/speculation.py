@@ -0,0 +1,243 @@
+import copy
+import sys
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field, replace
+from time import perf_counter
+from typing import Callable, Dict, Optional, Set, Tuple
+
+from game.diff import BoardDiff
+from game.logic.base import BaseLogic
+from game.metrics import Metrics
+from game.models import Board, GameObject, Position
+
+# Puts the time a move request spends on the network to use. Once a move is
+# sent the next board is guessed: every bot takes a step, ours the move just
+# sent and the others the same step as last tick, picking up diamonds,
+# scoring on their base and teleporting like on the server. Everything else
+# stays as it is. A copy of the controller decides on the guess in a worker
+# thread. When the real board arrives and matches the guess, the copy's move
+# is used right away and the copy becomes the controller. Otherwise the guess
+# is dropped and the controller decides on the real board as usual.
+#
+# Boards match when every object matches, except that milliseconds left only
+# have to agree to the move. Controllers read them in whole moves or seconds.
+
+Decide = Callable[[BaseLogic, GameObject, Board], Tuple[int, int]]
+
+# The worker holds the GIL while it decides, the reply should not wait long
+SWITCH_INTERVAL = 0.001
+
+
+def _next_move(logic: BaseLogic, board_bot: GameObject, board: Board) -> Tuple[int, int]:
+    return logic.next_move(board_bot, board)
+
+
+def board_state(board: Board) -> tuple:
+    # Everything a decision can depend on, milliseconds left in moves
+    delay = max(1, board.minimum_delay_between_moves)
+    objects = []
+    for game_object in board.game_objects or []:
+        properties = game_object.properties
+        if properties is None:
+            objects.append((game_object.id, game_object.type, game_object.position))
+            continue
+        left = properties.milliseconds_left
+        objects.append(
+            (
+                game_object.id,
+                game_object.type,
+                game_object.position,
+                properties.points,
+                properties.pair_id,
+                properties.diamonds,
+                properties.score,
+                properties.name,
+                properties.can_tackle,
+                None if left is None else left // delay,
+            )
+        )
+    objects.sort(key=lambda state: state[0])
+    return board.width, board.height, board.minimum_delay_between_moves, tuple(objects)
+
+
+def predict_board(
+    board: Board,
+    board_bot: GameObject,
+    move: Tuple[int, int],
+    previous: Optional[Board] = None,
+    interval: Optional[float] = None,
+) -> Board:
+    # The board expected after our move, other bots repeat their step from
+    # previous to board. interval is the time between boards in ms.
+    if interval is None:
+        interval = board.minimum_delay_between_moves
+    positions = board.positions
+    teleporters = board.distances.teleporters
+    last: Dict[int, Position] = {bot.id: bot.position for bot in previous.bots} if previous else {}
+    diamonds = {diamond.position: diamond for diamond in board.diamonds}
+    taken: Set[int] = set()
+
+    def step(bot: GameObject, dx: int, dy: int) -> GameObject:
+        properties = bot.properties
+        left = properties.milliseconds_left
+        changes = {"milliseconds_left": None if left is None else max(0, int(left - interval))}
+        position = bot.position
+        x, y = position.x + dx, position.y + dy
+        if (dx or dy) and positions.contains(x, y):
+            cell = y * board.width + x
+            position = positions[teleporters.get(cell, cell)]
+            carried = properties.diamonds or 0
+            diamond = diamonds.get(position)
+            if diamond is not None and diamond.id not in taken:
+                points = diamond.properties.points or 0
+                if carried + points <= (properties.inventory_size or 0):
+                    carried += points
+                    taken.add(diamond.id)
+            if properties.base is not None and position == properties.base:
+                changes["score"] = (properties.score or 0) + carried
+                carried = 0
+            changes["diamonds"] = carried
+        return replace(bot, position=position, properties=replace(properties, **changes))
+
+    stepped = {}
+    for bot in board.bots:
+        if bot.id == board_bot.id:
+            dx, dy = move
+        else:
+            before = last.get(bot.id)
+            dx = dy = 0
+            if before is not None and abs(bot.position.x - before.x) + abs(bot.position.y - before.y) == 1:
+                dx, dy = bot.position.x - before.x, bot.position.y - before.y
+        stepped[bot.id] = step(bot, dx, dy)
+
+    objects = [
+        stepped.get(game_object.id, game_object)
+        for game_object in board.game_objects or []
+        if game_object.id not in taken
+    ]
+    return Board(board.id, board.width, board.height, board.features, board.minimum_delay_between_moves, objects)
+
+
+@dataclass
+class Speculation:
+    future: Optional[Future] = None
+    # Set once the guessed board's state is known
+    predicted: threading.Event = field(default_factory=threading.Event)
+    state: Optional[tuple] = None
+    # Set once the controller has been copied, it is not read afterwards
+    copied: threading.Event = field(default_factory=threading.Event)
+
+
+class Speculator:
+    def __init__(
+        self,
+        logic: BaseLogic,
+        decide: Optional[Decide] = None,
+        metrics: Optional[Metrics] = None,
+        interval: Optional[float] = None,
+    ):
+        # Owns the controller from here on, it is replaced by a copy on a hit
+        self.logic = logic
+        self.decide = decide or _next_move
+        self.metrics = metrics
+        # Time between boards in ms, the board's minimum delay when not given
+        self.interval = interval
+        self.hits = 0
+        self.misses = 0
+        # Decision time of the hits that was not spent waiting for a move
+        self.saved = 0.0
+        self._pending: Optional[Speculation] = None
+        self._previous: Optional[Board] = None
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="speculation")
+        self._switch_interval = sys.getswitchinterval()
+        sys.setswitchinterval(min(self._switch_interval, SWITCH_INTERVAL))
+
+    def start(self, board: Board, board_bot: GameObject, move: Tuple[int, int]) -> None:
+        # Called once the move is sent, returns right away
+        speculation = Speculation()
+        speculation.future = self._executor.submit(
+            self._speculate, speculation, board, board_bot, move, self._previous
+        )
+        self._pending = speculation
+        self._previous = board
+
+    def _speculate(
+        self,
+        speculation: Speculation,
+        board: Board,
+        board_bot: GameObject,
+        move: Tuple[int, int],
+        previous: Optional[Board],
+    ) -> tuple:
+        try:
+            predicted = predict_board(board, board_bot, move, previous, self.interval)
+            speculation.state = board_state(predicted)
+        except Exception:
+            speculation.copied.set()
+            raise
+        finally:
+            speculation.predicted.set()
+        try:
+            # The boards the controller holds on to are shared, not copied
+            memo = {id(board): board, id(board.distances): board.distances}
+            if previous is not None:
+                memo[id(previous)] = previous
+            for game_object in board.game_objects or []:
+                memo[id(game_object)] = game_object
+            logic = copy.deepcopy(self.logic, memo)
+        finally:
+            speculation.copied.set()
+        predicted.carry_over(board, BoardDiff.between(board, predicted))
+        predicted_bot = next(bot for bot in predicted.bots if bot.id == board_bot.id)
+        start = perf_counter()
+        decided = self.decide(logic, predicted_bot, predicted)
+        return logic, decided, perf_counter() - start
+
+    def next_move(self, board_bot: GameObject, board: Board) -> Tuple[int, int]:
+        speculation, self._pending = self._pending, None
+        if speculation is not None:
+            start = perf_counter()
+            result = self._take(speculation, board)
+            if result is not None:
+                logic, decided, elapsed = result
+                saved = max(0.0, elapsed - (perf_counter() - start))
+                self.logic = logic
+                self.hits += 1
+                self.saved += saved
+                if self.metrics:
+                    self.metrics.count("speculation_hits")
+                    self.metrics.observe("speculation_saved", saved)
+                return decided
+            self.misses += 1
+            if self.metrics:
+                self.metrics.count("speculation_misses")
+            # The copy may still be in progress, the guess is left to finish
+            speculation.copied.wait()
+        return self.decide(self.logic, board_bot, board)
+
+    def _take(self, speculation: Speculation, board: Board) -> Optional[tuple]:
+        # The copied controller, its move and decision time when the guess
+        # matches the real board
+        speculation.predicted.wait()
+        if speculation.state is None or speculation.state != board_state(board):
+            return None
+        try:
+            return speculation.future.result()
+        except Exception:
+            return None
+
+    def summary(self) -> str:
+        total = self.hits + self.misses
+        return "Speculation: {} hits of {} ({:.0%}), {:.1f} ms saved, {:.2f} ms per hit".format(
+            self.hits,
+            total,
+            self.hits / total if total else 0.0,
+            self.saved * 1000,
+            self.saved * 1000 / self.hits if self.hits else 0.0,
+        )
+
+    def close(self) -> None:
+        # A guess being decided on is finished, it may be profiled
+        self._executor.shutdown(wait=True, cancel_futures=True)
+        sys.setswitchinterval(self._switch_interval)
@@ -14,4 +14,4 @@ def get_direction(current_x, current_y, dest_x, dest_y):
 
 
 def position_equals(a: Position, b: Position):
-    return a.x == b.x and a.y == b.y
+    return a == b
@@ -1,28 +1,29 @@
 import argparse
-from time import sleep
+import asyncio
+from functools import partial
+from time import perf_counter, sleep
 
+import requests
 from colorama import Back, Fore, Style, init
 from game.api import Api
+from game.async_api import AsyncApi
 from game.board_handler import BoardHandler
 from game.bot_handler import BotHandler
+from game.diff import BoardDiff
+from game.log import LEVELS, configure, get_logger
+from game.metrics import Metrics, MetricsExporter
+from game.models import Board
+from game.profiling import add_arguments as add_profile_arguments, from_arguments as profiler_from_arguments
+from game.recording import GameRecorder
+from game.scheduler import MoveScheduler
+from game.speculation import Speculator
 from game.util import *
 from game.logic.base import BaseLogic
-from game.logic.myBot import MyBot
-from game.logic.otherBots.random import Random
-from game.logic.otherBots.points import Points
-from game.logic.otherBots.chase import Chase
-from game.logic.otherBots.stay import Stay
+from game.logic.controllers import CONTROLLERS
 
 init()
 BASE_URL = "http://localhost:3000/api"
 DEFAULT_BOARD_ID = 1
-CONTROLLERS = {
-    "Random": Random,
-    "Points" : Points,
-    "MyBot" : MyBot,
-    "Chase" : Chase,
-    "Stay" : Stay
-}
 
 ###############################################################################
 #
@@ -58,14 +59,67 @@ parser.add_argument(
     ),
     action="store",
 )
+parser.add_argument(
+    "--async",
+    help="Run the game loop on asyncio, deciding on a guess of the next board (see --speculate) while the move request is pending",
+    dest="use_async",
+    action="store_true",
+)
+parser.add_argument(
+    "--log-level",
+    help="Lowest level written to the JSON lines log. Valid options are: {}".format(
+        ", ".join(LEVELS)
+    ),
+    default="info",
+    choices=list(LEVELS),
+    action="store",
+)
+parser.add_argument(
+    "--log-file", help="Write the log to this file instead of stderr", action="store"
+)
+parser.add_argument(
+    "--metrics-dir",
+    help="Export tick timings and move counts to metrics.prom and metrics.json in this directory",
+    action="store",
+)
+parser.add_argument(
+    "--metrics-interval",
+    help="Seconds between metrics exports",
+    default=10,
+    type=float,
+    action="store",
+)
+parser.add_argument(
+    "--record",
+    help="Write every board received to this compact binary game log, an existing file is overwritten",
+    action="store",
+)
+parser.add_argument(
+    "--speculate",
+    help="Decide on a guess of the next board while the move request is in flight, always on with --async",
+    action="store_true",
+)
+add_profile_arguments(parser)
 group = parser.add_argument_group("API connection")
 group.add_argument(
     "--host", action="store", default=BASE_URL, help="Default: {}".format(BASE_URL)
 )
+group.add_argument(
+    "--timeout",
+    help="Seconds to wait for the server, a move that times out is retried in the next slot. Default: no timeout",
+    type=float,
+    action="store",
+)
 args = parser.parse_args()
+configure(args.log_level, args.log_file)
+log = get_logger("main")
 
 time_factor = int(args.time_factor)
-api = Api(args.host)
+profiler = profiler_from_arguments(args)
+recorder = GameRecorder(args.record) if args.record else None
+metrics = Metrics()
+exporter = MetricsExporter(metrics, args.metrics_dir, args.metrics_interval)
+api = Api(args.host, connect_timeout=args.timeout, read_timeout=args.timeout, metrics=metrics)
 bot_handler = BotHandler(api)
 board_handler = BoardHandler(api)
 
@@ -123,6 +177,24 @@ print(Fore.BLUE + Style.BRIGHT + "Welcome back, " + Style.RESET_ALL + bot.name)
 logic_class = CONTROLLERS[logic_controller]
 bot_logic: BaseLogic = logic_class()
 
+
+def decide_with(logic: BaseLogic, board_bot, board: Board):
+    if profiler:
+        move = profiler.call(logic_controller, logic.next_move, board_bot, board)
+    else:
+        move = logic.next_move(board_bot, board)
+    logic.report(metrics)
+    return move
+
+
+speculator = None
+if args.speculate or args.use_async:
+    # Owns the controller from here on
+    speculator = Speculator(bot_logic, decide_with, metrics)
+    decide = speculator.next_move
+else:
+    decide = partial(decide_with, bot_logic)
+
 ###############################################################################
 #
 # Find a board to join
@@ -168,50 +240,188 @@ if not current_board_id:
 ###############################################################################
 board = board_handler.get_board(current_board_id)
 move_delay = board.minimum_delay_between_moves / 1000
+scheduler = MoveScheduler(move_delay * time_factor)
+metrics.start(move_delay * time_factor)
+if speculator:
+    speculator.interval = move_delay * time_factor * 1000
 
 ###############################################################################
 #
 # Game play loop
 #
 ###############################################################################
-while True:
-    # Find our info among the bots on the board
-    board_bot = board.get_bot(bot)
-    if not board_bot:
-        # Managed to get game over
-        break
-
-    # Calculate next move
-    delta_x, delta_y = bot_logic.next_move(board_bot, board)
-    # delta_x, delta_y = (1, 0)
-    if not board.is_valid_move(board_bot.position, delta_x, delta_y):
-        print(
-            Fore.YELLOW + Style.BRIGHT + "Warn:" + Style.RESET_ALL,
-            "Invalid move will be ignored."
-            + f" Your move: ({delta_x}, {delta_y}). Your position: ({board_bot.position.x}, {board_bot.position.y})",
-        )
-        sleep(1)
-        continue
+def refresh_board(previous: Board) -> Board:
+    # A board request that timed out keeps the previous board, the next slot
+    # decides on it and asks again
+    try:
+        return board_handler.get_board(current_board_id)
+    except requests.Timeout:
+        metrics.count("timeouts")
+        log.warning("board request timed out")
+        return previous
+
 
+async def refresh_board_async(async_api: AsyncApi, previous: Board) -> Board:
     try:
-        # Try to perform move
-        board = bot_handler.move(bot.id, current_board_id, delta_x, delta_y)
-    except Exception as e:
-        break
+        return await async_api.boards_get(current_board_id)
+    except requests.Timeout:
+        metrics.count("timeouts")
+        log.warning("board request timed out")
+        return previous
+
+
+async def play_async(board: Board) -> None:
+    # While the move request is pending the speculator decides on a guess of
+    # the next board, the reply then only has to be checked against the guess
+    async_api = AsyncApi(api)
+    loop = asyncio.get_running_loop()
+    while True:
+        tick_start = perf_counter()
+        exporter.maybe_export()
+        if profiler:
+            profiler.tick(logic_controller)
+        if recorder:
+            recorder.record(board)
+        # Find our info among the bots on the board
+        board_bot = board.get_bot(bot)
+        if not board_bot:
+            # Managed to get game over
+            break
+
+        # Calculate next move, already decided while the move was sent when the
+        # guess was right
+        with metrics.span("next_move"):
+            delta_x, delta_y = await loop.run_in_executor(
+                None, decide, board_bot, board
+            )
+        if not board.is_valid_move(board_bot.position, delta_x, delta_y):
+            metrics.count("invalid_moves")
+            log.warning(
+                "invalid move ignored",
+                delta_x=delta_x,
+                delta_y=delta_y,
+                x=board_bot.position.x,
+                y=board_bot.position.y,
+            )
+            # Spend the move slot on refreshing the board
+            with metrics.span("sleep"):
+                await asyncio.sleep(scheduler.time_until_next_move())
+            board = await refresh_board_async(async_api, board)
+            scheduler.move_skipped()
+            continue
+
+        # Don't spam the board more than it allows!
+        with metrics.span("sleep"):
+            await asyncio.sleep(scheduler.time_until_next_move())
+        scheduler.move_sent()
+        metrics.count("moves_sent")
+        if recorder:
+            recorder.record_moves({board_bot.id: (delta_x, delta_y)})
+        # The next decision starts on the guess while the request is pending
+        speculator.start(board, board_bot, (delta_x, delta_y))
+        try:
+            # Try to perform move
+            next_board = await async_api.bots_move(
+                bot.id, BotHandler._get_direction(delta_x, delta_y)
+            )
+        except requests.Timeout:
+            # The move may or may not have been made, the board tells
+            metrics.count("timeouts")
+            log.warning("move request timed out")
+            scheduler.move_skipped()
+            next_board = None
+        except Exception as e:
+            break
+        else:
+            scheduler.move_done(next_board is not None)
+            metrics.count("moves_accepted" if next_board else "moves_rejected")
+
+        if not next_board:
+            # Read new board state
+            next_board = await refresh_board_async(async_api, board)
 
-    if not board:
-        # Read new board state
-        board = board_handler.get_board(current_board_id)
+        # Keep whatever did not change since the previous board
+        with metrics.span("carry_over"):
+            next_board.carry_over(board, BoardDiff.between(board, next_board))
+        board = next_board
+        metrics.observe("tick", perf_counter() - tick_start)
 
-    # Get new state
-    board_bot = board.get_bot(bot)
-    if not board_bot:
-        # Managed to get game over after move
-        break
 
-    # Don't spam the board more than it allows!
-    # sleep(move_delay * time_factor)
-    sleep(1)
+if args.use_async:
+    asyncio.run(play_async(board))
+else:
+    while True:
+        tick_start = perf_counter()
+        exporter.maybe_export()
+        if profiler:
+            profiler.tick(logic_controller)
+        if recorder:
+            recorder.record(board)
+        # Find our info among the bots on the board
+        board_bot = board.get_bot(bot)
+        if not board_bot:
+            # Managed to get game over
+            break
+
+        # Calculate next move
+        with metrics.span("next_move"):
+            delta_x, delta_y = decide(board_bot, board)
+        # delta_x, delta_y = (1, 0)
+        if not board.is_valid_move(board_bot.position, delta_x, delta_y):
+            metrics.count("invalid_moves")
+            log.warning(
+                "invalid move ignored",
+                delta_x=delta_x,
+                delta_y=delta_y,
+                x=board_bot.position.x,
+                y=board_bot.position.y,
+            )
+            # Spend the move slot on refreshing the board
+            with metrics.span("sleep"):
+                sleep(scheduler.time_until_next_move())
+            board = refresh_board(board)
+            scheduler.move_skipped()
+            continue
+
+        # Don't spam the board more than it allows!
+        with metrics.span("sleep"):
+            sleep(scheduler.time_until_next_move())
+        scheduler.move_sent()
+        metrics.count("moves_sent")
+        if recorder:
+            recorder.record_moves({board_bot.id: (delta_x, delta_y)})
+        if speculator:
+            speculator.start(board, board_bot, (delta_x, delta_y))
+        previous_board = board
+        try:
+            # Try to perform move
+            board = bot_handler.move(bot.id, current_board_id, delta_x, delta_y)
+        except requests.Timeout:
+            # The move may or may not have been made, the board tells
+            metrics.count("timeouts")
+            log.warning("move request timed out")
+            scheduler.move_skipped()
+            board = None
+        except Exception as e:
+            break
+        else:
+            scheduler.move_done(board is not None)
+            metrics.count("moves_accepted" if board else "moves_rejected")
+
+        if not board:
+            # Read new board state
+            board = refresh_board(previous_board)
+
+        # Keep whatever did not change since the previous board
+        with metrics.span("carry_over"):
+            board.carry_over(previous_board, BoardDiff.between(previous_board, board))
+        metrics.observe("tick", perf_counter() - tick_start)
+
+        # Get new state
+        board_bot = board.get_bot(bot)
+        if not board_bot:
+            # Managed to get game over after move
+            break
 
 
 ###############################################################################
@@ -220,3 +430,27 @@ while True:
 #
 ###############################################################################
 print(Fore.BLUE + Style.BRIGHT + "Game over!" + Style.RESET_ALL)
+print(scheduler.summary())
+summary = metrics.summary()
+print(
+    "Moves accepted: {} of {} allowed ({:.0%}), invalid moves: {}".format(
+        summary["counters"].get("moves_accepted", 0),
+        summary["moves_allowed"],
+        summary["move_efficiency"],
+        summary["counters"].get("invalid_moves", 0),
+    )
+)
+# A hit replaces the controller with the copy that decided on the guess
+logic_summary = (speculator.logic if speculator else bot_logic).summary()
+if logic_summary:
+    print(logic_summary)
+if speculator:
+    speculator.close()
+    print(speculator.summary())
+exporter.export()
+if profiler:
+    profiler.close()
+    print("Profiles written to {}".format(args.profile_dir))
+if recorder:
+    recorder.close()
+    print("Recorded {} ticks in {} bytes to {}".format(recorder.ticks, recorder.bytes, args.record))
@@ -0,0 +1,39 @@
+import argparse
+
+from server.app import GameServer, create_server
+from server.engine import BoardConfig
+
+parser = argparse.ArgumentParser(description="Local Diamonds game server")
+parser.add_argument("--host", default="localhost", action="store")
+parser.add_argument("--port", default=3000, type=int, action="store")
+parser.add_argument("--boards", help="Number of boards", default=1, type=int, action="store")
+parser.add_argument("--width", default=15, type=int, action="store")
+parser.add_argument("--height", default=15, type=int, action="store")
+parser.add_argument(
+    "--delay", help="Minimum delay between moves in milliseconds", default=100, type=int, action="store"
+)
+parser.add_argument("--seconds", help="Length of a bot session", default=60, type=int, action="store")
+parser.add_argument("--inventory-size", default=5, type=int, action="store")
+parser.add_argument("--teleporters", help="Number of teleporter pairs", default=1, type=int, action="store")
+parser.add_argument("--seed", help="Seed for diamond and teleporter placement", type=int, action="store")
+parser.add_argument("--verbose", help="Log every request", action="store_true")
+args = parser.parse_args()
+
+config = BoardConfig(
+    width=args.width,
+    height=args.height,
+    minimum_delay_between_moves=args.delay,
+    session_seconds=args.seconds,
+    inventory_size=args.inventory_size,
+    teleporter_pairs=args.teleporters,
+)
+server = create_server(
+    GameServer(args.boards, config, args.seed), args.host, args.port, quiet=not args.verbose
+)
+print("Serving {} board(s) on http://{}:{}/api".format(args.boards, args.host, args.port))
+try:
+    server.serve_forever()
+except KeyboardInterrupt:
+    pass
+finally:
+    server.server_close()
@@ -0,0 +1,190 @@
+import json
+import re
+import threading
+import uuid
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from time import monotonic
+from typing import Callable, Dict, List, Optional, Tuple
+
+from server.engine import BoardConfig, BoardState, GameError
+
+
+@dataclass
+class Account:
+    id: str
+    name: str
+    email: str
+    password: str
+    team: str
+
+
+class GameServer:
+    # Accounts and boards behind the REST endpoints. Every board has its own
+    # lock so bots on different boards never wait on each other.
+    def __init__(self, boards: int = 1, config: BoardConfig = None, seed: int = None):
+        self.accounts: Dict[str, Account] = {}
+        self.accounts_by_email: Dict[str, Account] = {}
+        self.boards: Dict[int, BoardState] = {
+            board_id: BoardState(
+                board_id,
+                config or BoardConfig(),
+                None if seed is None else seed + board_id,
+            )
+            for board_id in range(1, boards + 1)
+        }
+        self.board_locks = {board_id: threading.Lock() for board_id in self.boards}
+        self.playing: Dict[str, int] = {}
+        self.accounts_lock = threading.Lock()
+
+    @staticmethod
+    def now() -> float:
+        return monotonic() * 1000
+
+    def _account(self, token: str) -> Account:
+        account = self.accounts.get(token)
+        if account is None:
+            raise GameError(404, "Bot not found")
+        return account
+
+    def _board(self, board_id) -> Tuple[BoardState, threading.Lock]:
+        try:
+            board_id = int(board_id)
+        except (TypeError, ValueError):
+            raise GameError(404, "Board not found")
+        if board_id not in self.boards:
+            raise GameError(404, "Board not found")
+        return self.boards[board_id], self.board_locks[board_id]
+
+    @staticmethod
+    def _bot_json(account: Account) -> dict:
+        return {"id": account.id, "name": account.name, "email": account.email, "team": account.team}
+
+    # ==================== Endpoints ==================== #
+    def register(self, body: dict) -> Tuple[int, dict]:
+        name, email = body.get("name"), body.get("email")
+        if not name or not email:
+            raise GameError(400, "Name and email are required")
+        with self.accounts_lock:
+            if email in self.accounts_by_email or any(
+                a.name == name for a in self.accounts.values()
+            ):
+                raise GameError(409, "Bot already exists")
+            account = Account(
+                str(uuid.uuid4()), name, email, body.get("password") or "", body.get("team") or ""
+            )
+            self.accounts[account.id] = account
+            self.accounts_by_email[email] = account
+        return 200, self._bot_json(account)
+
+    def recover(self, body: dict) -> Tuple[int, dict]:
+        account = self.accounts_by_email.get(body.get("email"))
+        if account is None or account.password != body.get("password"):
+            raise GameError(404, "Bot not found")
+        return 201, {"id": account.id}
+
+    def get_bot(self, token: str) -> Tuple[int, dict]:
+        return 200, self._bot_json(self._account(token))
+
+    def join(self, token: str, body: dict) -> Tuple[int, dict]:
+        account = self._account(token)
+        board, lock = self._board(body.get("preferredBoardId") or 1)
+        with lock:
+            now = self.now()
+            board.join(account.name, now)
+            self.playing[token] = board.id
+            return 200, board.to_json(now)
+
+    def move(self, token: str, body: dict) -> Tuple[int, dict]:
+        account = self._account(token)
+        board, lock = self._board(self.playing.get(token))
+        with lock:
+            now = self.now()
+            board.move(account.name, body.get("direction"), now)
+            return 200, board.to_json(now)
+
+    def list_boards(self) -> Tuple[int, List[dict]]:
+        boards = []
+        for board_id, board in self.boards.items():
+            with self.board_locks[board_id]:
+                now = self.now()
+                board.update(now)
+                boards.append(board.to_json(now))
+        return 200, boards
+
+    def get_board(self, board_id: str) -> Tuple[int, dict]:
+        board, lock = self._board(board_id)
+        with lock:
+            now = self.now()
+            board.update(now)
+            return 200, board.to_json(now)
+
+    def routes(self) -> List[Tuple[str, "re.Pattern", Callable]]:
+        return [
+            ("POST", re.compile(r"^/api/bots/?$"), lambda body: self.register(body)),
+            ("POST", re.compile(r"^/api/bots/recover/?$"), lambda body: self.recover(body)),
+            ("GET", re.compile(r"^/api/bots/([^/]+)/?$"), lambda body, token: self.get_bot(token)),
+            ("POST", re.compile(r"^/api/bots/([^/]+)/join/?$"), lambda body, token: self.join(token, body)),
+            ("POST", re.compile(r"^/api/bots/([^/]+)/move/?$"), lambda body, token: self.move(token, body)),
+            ("GET", re.compile(r"^/api/boards/?$"), lambda body: self.list_boards()),
+            ("GET", re.compile(r"^/api/boards/([^/]+)/?$"), lambda body, board_id: self.get_board(board_id)),
+        ]
+
+
+class RequestHandler(BaseHTTPRequestHandler):
+    # Keep-alive, so pooled clients reuse their connections
+    protocol_version = "HTTP/1.1"
+    game: GameServer = None
+    routes: list = []
+    quiet = True
+
+    def _dispatch(self, method: str) -> None:
+        length = int(self.headers.get("Content-Length") or 0)
+        raw = self.rfile.read(length) if length else b""
+        path = self.path.split("?", 1)[0]
+        try:
+            body = json.loads(raw) if raw else {}
+            for route_method, pattern, handler in self.routes:
+                match = pattern.match(path)
+                if route_method == method and match:
+                    status, data = handler(body, *match.groups())
+                    break
+            else:
+                raise GameError(404, "Not found")
+            payload = {"data": data}
+        except GameError as e:
+            status, payload = e.status, {"statusCode": e.status, "message": e.message}
+        except json.JSONDecodeError:
+            status, payload = 400, {"statusCode": 400, "message": "Invalid JSON"}
+        except Exception as e:
+            status, payload = 500, {"statusCode": 500, "message": str(e)}
+
+        response = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(response)))
+        self.end_headers()
+        self.wfile.write(response)
+
+    def do_GET(self):
+        self._dispatch("GET")
+
+    def do_POST(self):
+        self._dispatch("POST")
+
+    def log_message(self, format, *args):
+        if not self.quiet:
+            super().log_message(format, *args)
+
+
+def create_server(
+    game: GameServer, host: str = "localhost", port: int = 3000, quiet: bool = True
+) -> ThreadingHTTPServer:
+    handler = type(
+        "GameRequestHandler",
+        (RequestHandler,),
+        {"game": game, "routes": game.routes(), "quiet": quiet},
+    )
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
@@ -0,0 +1,296 @@
+import random
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+
+# Game rules of the Diamonds engine, kept free of any I/O so they can be served
+# over HTTP or stepped in-process. Every call takes the current time in
+# milliseconds, which lets callers use a real or a simulated clock.
+
+DIRECTIONS = {
+    "NORTH": (0, -1),
+    "SOUTH": (0, 1),
+    "EAST": (1, 0),
+    "WEST": (-1, 0),
+}
+
+
+class GameError(Exception):
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+@dataclass
+class BoardConfig:
+    width: int = 15
+    height: int = 15
+    minimum_delay_between_moves: int = 100
+    session_seconds: int = 60
+    inventory_size: int = 5
+    can_tackle: bool = True
+    generation_ratio: float = 0.1
+    min_ratio_for_generation: float = 0.01
+    red_ratio: float = 0.2
+    teleporter_pairs: int = 1
+    teleport_relocation_seconds: int = 10
+
+
+@dataclass
+class Entity:
+    id: int
+    x: int
+    y: int
+
+
+@dataclass
+class BotEntity(Entity):
+    name: str = ""
+    base: Optional[Entity] = None
+    diamonds: int = 0
+    score: int = 0
+    joined_at: float = 0
+    ends_at: float = 0
+    last_move_at: Optional[float] = None
+    time_joined: str = ""
+    tackles: int = 0
+    tackled: int = 0
+
+
+@dataclass
+class DiamondEntity(Entity):
+    points: int = 1
+
+
+@dataclass
+class TeleporterEntity(Entity):
+    pair_id: str = ""
+
+
+@dataclass
+class BoardState:
+    id: int
+    config: BoardConfig = field(default_factory=BoardConfig)
+    seed: Optional[int] = None
+
+    def __post_init__(self):
+        self.rng = random.Random(self.seed)
+        self.bots: Dict[str, BotEntity] = {}
+        # Bots whose session is over, with their final score
+        self.finished: Dict[str, BotEntity] = {}
+        self.diamonds: Dict[Tuple[int, int], DiamondEntity] = {}
+        self.teleporters: List[TeleporterEntity] = []
+        self.button: Optional[Entity] = None
+        self._next_id = 1
+        self._next_relocation: Optional[float] = None
+
+    # ==================== Objects ==================== #
+    def _new_id(self) -> int:
+        self._next_id += 1
+        return self._next_id - 1
+
+    def _occupied(self) -> set:
+        cells = set(self.diamonds)
+        for bot in self.bots.values():
+            cells.add((bot.x, bot.y))
+            cells.add((bot.base.x, bot.base.y))
+        cells.update((t.x, t.y) for t in self.teleporters)
+        if self.button:
+            cells.add((self.button.x, self.button.y))
+        return cells
+
+    def _empty_cells(self, count: int) -> List[Tuple[int, int]]:
+        occupied = self._occupied()
+        free = [
+            (x, y)
+            for y in range(self.config.height)
+            for x in range(self.config.width)
+            if (x, y) not in occupied
+        ]
+        return self.rng.sample(free, min(count, len(free)))
+
+    def _place_teleporters(self) -> None:
+        self.teleporters = []
+        cells = self._empty_cells(self.config.teleporter_pairs * 2)
+        for pair in range(len(cells) // 2):
+            for x, y in cells[pair * 2 : pair * 2 + 2]:
+                self.teleporters.append(
+                    TeleporterEntity(self._new_id(), x, y, pair_id=str(pair + 1))
+                )
+
+    def _place_button(self) -> None:
+        cells = self._empty_cells(1)
+        self.button = Entity(self._new_id(), *cells[0]) if cells else None
+
+    def _generate_diamonds(self, force: bool = False) -> None:
+        cells = self.config.width * self.config.height
+        if not force and len(self.diamonds) / cells >= self.config.min_ratio_for_generation:
+            return
+        wanted = int(cells * self.config.generation_ratio) - len(self.diamonds)
+        for x, y in self._empty_cells(max(0, wanted)):
+            points = 2 if self.rng.random() < self.config.red_ratio else 1
+            self.diamonds[(x, y)] = DiamondEntity(self._new_id(), x, y, points=points)
+
+    # ==================== Timers ==================== #
+    def update(self, now: float) -> None:
+        if self.button is None:
+            self._place_button()
+        if self._next_relocation is None or now >= self._next_relocation:
+            self._place_teleporters()
+            self._next_relocation = now + self.config.teleport_relocation_seconds * 1000
+
+        for name in [name for name, bot in self.bots.items() if bot.ends_at <= now]:
+            self.finished[name] = self.bots.pop(name)
+        self._generate_diamonds()
+
+    # ==================== Actions ==================== #
+    def join(self, name: str, now: float) -> BotEntity:
+        self.update(now)
+        if name in self.bots:
+            raise GameError(409, "Bot is already on the board")
+        cells = self._empty_cells(1)
+        if not cells:
+            raise GameError(409, "Board is full")
+        x, y = cells[0]
+        bot = BotEntity(
+            self._new_id(),
+            x,
+            y,
+            name=name,
+            base=Entity(self._new_id(), x, y),
+            joined_at=now,
+            ends_at=now + self.config.session_seconds * 1000,
+            time_joined=datetime.now(timezone.utc).isoformat(timespec="milliseconds"),
+        )
+        self.bots[name] = bot
+        return bot
+
+    def move(self, name: str, direction: str, now: float) -> BotEntity:
+        self.update(now)
+        bot = self.bots.get(name)
+        if bot is None:
+            raise GameError(403, "Bot is not on the board")
+        if direction not in DIRECTIONS:
+            raise GameError(400, "Invalid direction")
+        if (
+            bot.last_move_at is not None
+            and now - bot.last_move_at < self.config.minimum_delay_between_moves
+        ):
+            raise GameError(429, "Too many moves")
+
+        dx, dy = DIRECTIONS[direction]
+        x, y = bot.x + dx, bot.y + dy
+        if not (0 <= x < self.config.width and 0 <= y < self.config.height):
+            raise GameError(400, "Move is outside the board")
+        bot.last_move_at = now
+
+        for teleporter in self.teleporters:
+            if (teleporter.x, teleporter.y) == (x, y):
+                pair = next(
+                    t
+                    for t in self.teleporters
+                    if t.pair_id == teleporter.pair_id and t is not teleporter
+                )
+                x, y = pair.x, pair.y
+                break
+
+        if self.config.can_tackle:
+            for other in self.bots.values():
+                if other is not bot and (other.x, other.y) == (x, y):
+                    self._tackle(bot, other)
+
+        bot.x, bot.y = x, y
+        diamond = self.diamonds.get((x, y))
+        if diamond and bot.diamonds + diamond.points <= self.config.inventory_size:
+            bot.diamonds += diamond.points
+            del self.diamonds[(x, y)]
+        if (x, y) == (bot.base.x, bot.base.y):
+            bot.score += bot.diamonds
+            bot.diamonds = 0
+        if self.button and (x, y) == (self.button.x, self.button.y):
+            self.diamonds = {}
+            self._generate_diamonds(force=True)
+            self._place_button()
+
+        self._generate_diamonds()
+        return bot
+
+    def _tackle(self, attacker: BotEntity, victim: BotEntity) -> None:
+        attacker.diamonds = min(
+            self.config.inventory_size, attacker.diamonds + victim.diamonds
+        )
+        victim.diamonds = 0
+        victim.x, victim.y = victim.base.x, victim.base.y
+        attacker.tackles += 1
+        victim.tackled += 1
+
+    # ==================== Serialization ==================== #
+    def to_json(self, now: float) -> dict:
+        # Same camelCase shape as the Diamonds game engine
+        config = self.config
+        objects = []
+
+        def add(entity: Entity, type: str, properties: dict) -> None:
+            objects.append(
+                {
+                    "id": entity.id,
+                    "position": {"x": entity.x, "y": entity.y},
+                    "type": type,
+                    "properties": properties,
+                }
+            )
+
+        for bot in self.bots.values():
+            add(bot.base, "BaseGameObject", {"name": bot.name})
+            add(
+                bot,
+                "BotGameObject",
+                {
+                    "diamonds": bot.diamonds,
+                    "score": bot.score,
+                    "name": bot.name,
+                    "inventorySize": config.inventory_size,
+                    "canTackle": config.can_tackle,
+                    "millisecondsLeft": max(0, int(bot.ends_at - now)),
+                    "timeJoined": bot.time_joined,
+                    "base": {"x": bot.base.x, "y": bot.base.y},
+                },
+            )
+        for teleporter in self.teleporters:
+            add(teleporter, "TeleportGameObject", {"pairId": teleporter.pair_id})
+        if self.button:
+            add(self.button, "DiamondButtonGameObject", {})
+        for diamond in self.diamonds.values():
+            add(diamond, "DiamondGameObject", {"points": diamond.points})
+
+        return {
+            "id": self.id,
+            "width": config.width,
+            "height": config.height,
+            "minimumDelayBetweenMoves": config.minimum_delay_between_moves,
+            "features": [
+                {
+                    "name": "DiamondProvider",
+                    "config": {
+                        "generationRatio": config.generation_ratio,
+                        "minRatioForGeneration": config.min_ratio_for_generation,
+                        "redRatio": config.red_ratio,
+                    },
+                },
+                {"name": "DiamondButtonProvider", "config": {}},
+                {"name": "TeleportProvider", "config": {"pairs": config.teleporter_pairs}},
+                {
+                    "name": "TeleportRelocationProvider",
+                    "config": {"seconds": config.teleport_relocation_seconds},
+                },
+                {
+                    "name": "BotProvider",
+                    "config": {
+                        "inventorySize": config.inventory_size,
+                        "canTackle": config.can_tackle,
+                    },
+                },
+            ],
+            "gameObjects": objects,
+        }
@@ -0,0 +1,71 @@
+import argparse
+import os
+
+from game.logic.controllers import CONTROLLERS
+from game.profiling import add_arguments as add_profile_arguments, from_arguments as profiler_from_arguments
+from game.recording import GameRecorder
+from server.engine import BoardConfig
+from simulator.match import Match
+
+parser = argparse.ArgumentParser(description="Play Diamonds matches in-process")
+parser.add_argument(
+    "--bots",
+    help="Comma separated controllers, one per bot. Valid options are: {}".format(
+        ", ".join(CONTROLLERS)
+    ),
+    default="MyBot,Points,Chase,Random",
+    action="store",
+)
+parser.add_argument("--matches", default=1, type=int, action="store")
+parser.add_argument("--seed", default=0, type=int, action="store")
+parser.add_argument("--width", default=15, type=int, action="store")
+parser.add_argument("--height", default=15, type=int, action="store")
+parser.add_argument("--seconds", help="Length of a bot session", default=60, type=int, action="store")
+parser.add_argument("--teleporters", help="Number of teleporter pairs", default=1, type=int, action="store")
+parser.add_argument("--record", help="Record every match to this directory", action="store")
+add_profile_arguments(parser)
+args = parser.parse_args()
+profiler = profiler_from_arguments(args)
+
+controllers = args.bots.split(",")
+for controller in controllers:
+    if controller not in CONTROLLERS:
+        parser.error("Invalid logic controller: {}".format(controller))
+config = BoardConfig(
+    width=args.width,
+    height=args.height,
+    session_seconds=args.seconds,
+    teleporter_pairs=args.teleporters,
+)
+
+ticks = elapsed = 0
+for number in range(args.matches):
+    recorder = None
+    if args.record:
+        os.makedirs(args.record, exist_ok=True)
+        recorder = GameRecorder(os.path.join(args.record, "match_{}.rec".format(args.seed + number)))
+    result = Match(controllers, config, seed=args.seed + number, profiler=profiler, recorder=recorder).run()
+    if recorder:
+        recorder.close()
+    ticks += result.ticks
+    elapsed += result.elapsed
+    print("Match {} (seed {}), {} ticks".format(number + 1, result.seed, result.ticks))
+    for bot in sorted(result.bots, key=lambda bot: -bot.score):
+        print(
+            "  {:<10} {:<8} score {:>3}  tackles {:>2}  moves {:>4}  invalid {:>3}  errors {:>3}  decision {:7.3f} ms".format(
+                bot.name,
+                bot.controller,
+                bot.score,
+                bot.tackles,
+                bot.moves,
+                bot.invalid_moves,
+                bot.errors,
+                bot.mean_decision_time * 1000,
+            )
+        )
+        if bot.summary:
+            print("    {}".format(bot.summary))
+print("{:.0f} ticks/s".format(ticks / elapsed if elapsed else 0))
+if profiler:
+    profiler.close()
+    print("Profiles written to {}".format(args.profile_dir))
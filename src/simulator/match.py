@@ -0,0 +1,168 @@
+import contextlib
+import os
+import random
+from dataclasses import dataclass, field
+from time import perf_counter
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from game.logic.base import BaseLogic
+from game.logic.controllers import CONTROLLERS
+from game.models import Board
+from game.parser import parse_board
+from game.profiling import Profiler
+from game.recording import GameRecorder
+from server.engine import BoardConfig, BoardState, GameError
+
+MOVES = {(1, 0): "EAST", (-1, 0): "WEST", (0, 1): "SOUTH", (0, -1): "NORTH"}
+
+
+@dataclass
+class BotResult:
+    name: str
+    controller: str
+    score: int = 0
+    tackles: int = 0
+    tackled: int = 0
+    moves: int = 0
+    invalid_moves: int = 0
+    errors: int = 0
+    decision_time: float = 0.0
+    decision_times: List[float] = field(default_factory=list, repr=False)
+    # The controller's own numbers, see BaseLogic.summary
+    summary: Optional[str] = None
+
+    @property
+    def mean_decision_time(self) -> float:
+        decisions = len(self.decision_times)
+        return self.decision_time / decisions if decisions else 0.0
+
+
+@dataclass
+class MatchResult:
+    seed: Optional[int]
+    ticks: int
+    elapsed: float
+    bots: List[BotResult]
+
+    @property
+    def ticks_per_second(self) -> float:
+        return self.ticks / self.elapsed if self.elapsed else 0.0
+
+
+class Match:
+    # Plays a whole game in-process: the server rules run on a simulated clock
+    # and every controller gets a genuine Board each tick, with no network and
+    # no sleeping. All bots decide on the same snapshot, then the moves are
+    # applied in a random order, as if they reached the server together.
+    def __init__(
+        self,
+        controllers: Sequence[str],
+        config: BoardConfig = None,
+        seed: Optional[int] = None,
+        quiet: bool = True,
+        profiler: Optional[Profiler] = None,
+        recorder: Optional[GameRecorder] = None,
+    ):
+        self.config = config or BoardConfig()
+        self.seed = seed
+        self.quiet = quiet
+        self.profiler = profiler
+        self.recorder = recorder
+        self.rng = random.Random(seed)
+        self.state = BoardState(1, self.config, seed)
+        self.now = 0.0
+        self.tick = 0
+
+        self.players: List[Tuple[str, BaseLogic, BotResult]] = []
+        for number, controller in enumerate(controllers, start=1):
+            name = "{}{}".format(controller.lower(), number)
+            self.players.append(
+                (name, CONTROLLERS[controller](), BotResult(name, controller))
+            )
+
+    def board(self) -> Board:
+        # Like the server on every request: ends bot sessions, relocates
+        # teleporters and regenerates diamonds before the board is read
+        self.state.update(self.now)
+        return parse_board(self.state.to_json(self.now))
+
+    def step(self) -> Optional[Board]:
+        # One move slot for every bot, returns the board the bots decided on
+        # or None once every bot's session is over
+        if self.profiler:
+            # Ticks are shared by every bot, they are profiled as a whole
+            self.profiler.tick("tick")
+        board = self.board()
+        if self.recorder:
+            self.recorder.record(board)
+        bots = board.index.bots_by_name
+        if not bots:
+            return None
+
+        moves = []
+        played = {}
+        for name, logic, result in self.players:
+            board_bot = bots.get(name)
+            if board_bot is None:
+                continue
+            start = perf_counter()
+            try:
+                if self.profiler:
+                    move = self.profiler.call(result.controller, logic.next_move, board_bot, board)
+                else:
+                    move = logic.next_move(board_bot, board)
+            except Exception:
+                result.errors += 1
+                continue
+            finally:
+                elapsed = perf_counter() - start
+                result.decision_time += elapsed
+                result.decision_times.append(elapsed)
+            direction = MOVES.get(tuple(move) if move else None)
+            if direction is None:
+                result.invalid_moves += 1
+                continue
+            moves.append((name, direction, result))
+            played[board_bot.id] = tuple(move)
+
+        if self.recorder:
+            self.recorder.record_moves(played)
+
+        self.rng.shuffle(moves)
+        for name, direction, result in moves:
+            try:
+                self.state.move(name, direction, self.now)
+                result.moves += 1
+            except GameError:
+                result.invalid_moves += 1
+
+        self.tick += 1
+        self.now += self.config.minimum_delay_between_moves
+        return board
+
+    def run(self, max_ticks: Optional[int] = None) -> MatchResult:
+        if self.seed is not None:
+            # Controllers draw from the global random module
+            random.seed(self.seed)
+        for name, _, _ in self.players:
+            self.state.join(name, self.now)
+
+        start = perf_counter()
+        with contextlib.ExitStack() as stack:
+            if self.quiet:
+                # Controllers print from their decision path
+                devnull = stack.enter_context(open(os.devnull, "w"))
+                stack.enter_context(contextlib.redirect_stdout(devnull))
+            while max_ticks is None or self.tick < max_ticks:
+                if self.step() is None:
+                    break
+        elapsed = perf_counter() - start
+
+        for name, logic, result in self.players:
+            result.summary = logic.summary()
+            bot = self.state.bots.get(name) or self.state.finished.get(name)
+            if bot:
+                result.score = bot.score
+                result.tackles = bot.tackles
+                result.tackled = bot.tackled
+        return MatchResult(self.seed, self.tick, elapsed, [p[2] for p in self.players])
@@ -0,0 +1,134 @@
+import argparse
+import os
+import random
+from dataclasses import dataclass, field
+from time import perf_counter
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from game.diff import BoardDiff
+from game.logic.base import BaseLogic
+from game.logic.controllers import CONTROLLERS
+from game.replay import Replay, recordings
+
+# Re-runs a controller against recorded games and compares its decisions with
+# the moves that were actually played. Every recorded bot gets a fresh
+# controller that sees every board of the game in order, like it would live,
+# and its next_move is compared on the boards a move was recorded for.
+# Recordings are read one at a time and only totals are kept, so thousands of
+# games stream through in bounded memory.
+
+MAX_DISAGREEMENTS = 10
+
+
+@dataclass
+class Comparison:
+    path: str
+    bot: str
+    decisions: int = 0
+    agreed: int = 0
+    errors: int = 0
+    # First disagreements: tick, move played, move decided now
+    disagreements: List[Tuple[int, Tuple[int, int], Optional[Tuple[int, int]]]] = field(default_factory=list)
+
+    @property
+    def agreement(self) -> float:
+        return self.agreed / self.decisions if self.decisions else 0.0
+
+
+def compare(
+    replay: Replay,
+    controller: Callable[[], BaseLogic],
+    names: Optional[Sequence[str]] = None,
+    max_disagreements: int = MAX_DISAGREEMENTS,
+) -> List[Comparison]:
+    played = replay.played_by()
+    players: Dict[int, Tuple[BaseLogic, Comparison]] = {}
+    previous = None
+    for tick in replay:
+        board = tick.board
+        if previous is not None:
+            board.carry_over(previous, BoardDiff.between(previous, board))
+        previous = board
+        moves = tick.moves
+        for board_bot in board.bots:
+            if board_bot.id not in played or (names and board_bot.properties.name not in names):
+                continue
+            player = players.get(board_bot.id)
+            if player is None:
+                player = players[board_bot.id] = (controller(), Comparison(replay.path, board_bot.properties.name))
+            logic, comparison = player
+            try:
+                move = logic.next_move(board_bot, board)
+            except Exception:
+                comparison.errors += 1
+                move = None
+            recorded = moves.get(board_bot.id)
+            if recorded is None:
+                continue
+            decided = tuple(move) if move else None
+            comparison.decisions += 1
+            if decided == recorded:
+                comparison.agreed += 1
+            elif len(comparison.disagreements) < max_disagreements:
+                comparison.disagreements.append((tick.number, recorded, decided))
+    return [comparison for _, comparison in players.values()]
+
+
+def recording_paths(paths: Sequence[str]) -> Iterator[str]:
+    # Files as given, directories for their .rec files
+    for path in paths:
+        if os.path.isdir(path):
+            for name in sorted(os.listdir(path)):
+                if name.endswith(".rec"):
+                    yield os.path.join(path, name)
+        else:
+            yield path
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Compare a controller's decisions with the moves played in recorded games"
+    )
+    parser.add_argument("recordings", help="Recordings or directories of recordings", nargs="+")
+    parser.add_argument(
+        "--logic",
+        help="Valid options are: {}".format(", ".join(CONTROLLERS.keys())),
+        default="MyBot",
+        action="store",
+    )
+    parser.add_argument("--bot", help="Only compare the bots with this name", action="append")
+    parser.add_argument("--seed", help="Seed for controllers drawing random numbers", type=int, action="store")
+    parser.add_argument("--verbose", help="Print every recording and its disagreements", action="store_true")
+    args = parser.parse_args()
+    if args.logic not in CONTROLLERS:
+        parser.error("Invalid logic controller: {}".format(args.logic))
+
+    controller = CONTROLLERS[args.logic]
+    games = decisions = agreed = errors = 0
+    start = perf_counter()
+    for replay in recordings(recording_paths(args.recordings)):
+        if args.seed is not None:
+            random.seed(args.seed)
+        games += 1
+        for comparison in compare(replay, controller, args.bot):
+            decisions += comparison.decisions
+            agreed += comparison.agreed
+            errors += comparison.errors
+            if args.verbose:
+                print(
+                    "{}  {:<10} decisions {:>4}  agreed {:6.1%}  errors {:>3}".format(
+                        comparison.path, comparison.bot, comparison.decisions, comparison.agreement, comparison.errors
+                    )
+                )
+                for number, recorded, decided in comparison.disagreements:
+                    print("    tick {:>4}  played {}  decided {}".format(number, recorded, decided))
+    elapsed = perf_counter() - start
+    print(
+        "{} games, {} decisions, {} agreed ({:.1%}), {} errors, {:.1f} s".format(
+            games, decisions, agreed, agreed / decisions if decisions else 0.0, errors, elapsed
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,266 @@
+import argparse
+import os
+import random
+import sqlite3
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass
+from itertools import combinations
+from time import perf_counter
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from game.logic.controllers import CONTROLLERS
+from game.metrics import percentile
+from game.recording import GameRecorder
+from server.engine import BoardConfig
+from simulator.match import Match
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS matches (
+    id INTEGER PRIMARY KEY,
+    seed INTEGER NOT NULL,
+    ticks INTEGER NOT NULL,
+    elapsed REAL NOT NULL,
+    lineup TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS results (
+    match_id INTEGER NOT NULL REFERENCES matches(id),
+    bot TEXT NOT NULL,
+    controller TEXT NOT NULL,
+    rank INTEGER NOT NULL,
+    score INTEGER NOT NULL,
+    tackles INTEGER NOT NULL,
+    tackled INTEGER NOT NULL,
+    moves INTEGER NOT NULL,
+    invalid_moves INTEGER NOT NULL,
+    errors INTEGER NOT NULL,
+    decision_mean_ms REAL NOT NULL,
+    decision_p50_ms REAL NOT NULL,
+    decision_p99_ms REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS ratings (
+    controller TEXT PRIMARY KEY,
+    rating REAL NOT NULL,
+    games INTEGER NOT NULL,
+    mean_score REAL NOT NULL
+);
+"""
+
+ELO_START = 1500.0
+ELO_K = 16.0
+
+
+@dataclass
+class BotRow:
+    bot: str
+    controller: str
+    rank: int
+    score: int
+    tackles: int
+    tackled: int
+    moves: int
+    invalid_moves: int
+    errors: int
+    decision_mean_ms: float
+    decision_p50_ms: float
+    decision_p99_ms: float
+
+
+@dataclass
+class MatchRow:
+    id: int
+    seed: int
+    ticks: int
+    elapsed: float
+    lineup: str
+    bots: List[BotRow]
+
+
+def lineup_for(seed: int, pool: List[str], size: int) -> List[str]:
+    return random.Random(seed).choices(pool, k=size)
+
+
+def play(job: Tuple[int, int, List[str], BoardConfig, Optional[str]]) -> MatchRow:
+    # Runs in a worker process, only the summary goes back to the parent
+    match_id, seed, lineup, config, record = job
+    recorder = GameRecorder(os.path.join(record, "match_{}.rec".format(match_id))) if record else None
+    try:
+        result = Match(lineup, config, seed, recorder=recorder).run()
+    finally:
+        if recorder:
+            recorder.close()
+    ranked = sorted(result.bots, key=lambda bot: -bot.score)
+    rows = []
+    for bot in result.bots:
+        rows.append(
+            BotRow(
+                bot=bot.name,
+                controller=bot.controller,
+                rank=1 + sum(other.score > bot.score for other in ranked),
+                score=bot.score,
+                tackles=bot.tackles,
+                tackled=bot.tackled,
+                moves=bot.moves,
+                invalid_moves=bot.invalid_moves,
+                errors=bot.errors,
+                decision_mean_ms=bot.mean_decision_time * 1000,
+                decision_p50_ms=percentile(bot.decision_times, 0.5) * 1000,
+                decision_p99_ms=percentile(bot.decision_times, 0.99) * 1000,
+            )
+        )
+    return MatchRow(match_id, seed, result.ticks, result.elapsed, ",".join(lineup), rows)
+
+
+def update_elo(ratings: Dict[str, float], bots: List[BotRow]) -> None:
+    # Every pair of different controllers in a match is one game, scaled so a
+    # match moves a rating about as much as a single two player game
+    pairs = [(a, b) for a, b in combinations(bots, 2) if a.controller != b.controller]
+    if not pairs:
+        return
+    k = ELO_K / max(1, len(bots) - 1)
+    deltas: Dict[str, float] = {}
+    for a, b in pairs:
+        ra = ratings.setdefault(a.controller, ELO_START)
+        rb = ratings.setdefault(b.controller, ELO_START)
+        expected = 1 / (1 + 10 ** ((rb - ra) / 400))
+        actual = 1.0 if a.score > b.score else 0.0 if a.score < b.score else 0.5
+        deltas[a.controller] = deltas.get(a.controller, 0.0) + k * (actual - expected)
+        deltas[b.controller] = deltas.get(b.controller, 0.0) - k * (actual - expected)
+    for controller, delta in deltas.items():
+        ratings[controller] += delta
+
+
+class ResultStore:
+    def __init__(self, path: str):
+        self.connection = sqlite3.connect(path)
+        self.connection.executescript(SCHEMA)
+
+    def next_match_id(self) -> int:
+        (last,) = self.connection.execute("SELECT MAX(id) FROM matches").fetchone()
+        return (last or 0) + 1
+
+    def add(self, matches: Iterable[MatchRow]) -> None:
+        with self.connection:
+            for match in matches:
+                self.connection.execute(
+                    "INSERT INTO matches VALUES (?, ?, ?, ?, ?)",
+                    (match.id, match.seed, match.ticks, match.elapsed, match.lineup),
+                )
+                self.connection.executemany(
+                    "INSERT INTO results VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    [(match.id, *asdict(bot).values()) for bot in match.bots],
+                )
+
+    def update_ratings(self) -> List[Tuple[str, float, int, float]]:
+        # Replayed over every stored match in order, so ratings do not depend
+        # on which worker finished first
+        ratings: Dict[str, float] = {}
+        match_bots: Dict[int, List[BotRow]] = {}
+        for row in self.connection.execute(
+            "SELECT match_id, bot, controller, rank, score, tackles, tackled, moves, "
+            "invalid_moves, errors, decision_mean_ms, decision_p50_ms, decision_p99_ms "
+            "FROM results ORDER BY match_id"
+        ):
+            match_bots.setdefault(row[0], []).append(BotRow(*row[1:]))
+        for bots in match_bots.values():
+            update_elo(ratings, bots)
+
+        rows = []
+        for controller, rating in ratings.items():
+            games, mean_score = self.connection.execute(
+                "SELECT COUNT(*), AVG(score) FROM results WHERE controller = ?",
+                (controller,),
+            ).fetchone()
+            rows.append((controller, rating, games, mean_score))
+        rows.sort(key=lambda row: -row[1])
+        with self.connection:
+            self.connection.execute("DELETE FROM ratings")
+            self.connection.executemany("INSERT INTO ratings VALUES (?, ?, ?, ?)", rows)
+        return rows
+
+    def close(self) -> None:
+        self.connection.close()
+
+
+def run_tournament(
+    pool: List[str],
+    games: int,
+    bots_per_match: int = 4,
+    seed: int = 0,
+    workers: Optional[int] = None,
+    database: str = "tournament.sqlite",
+    config: BoardConfig = None,
+    record: Optional[str] = None,
+) -> List[Tuple[str, float, int, float]]:
+    config = config or BoardConfig()
+    if record:
+        os.makedirs(record, exist_ok=True)
+    store = ResultStore(database)
+    first_id = store.next_match_id()
+    jobs = [
+        (first_id + number, seed + number, lineup_for(seed + number, pool, bots_per_match), config, record)
+        for number in range(games)
+    ]
+    workers = workers or os.cpu_count() or 1
+    # Big enough chunks to keep the pickling overhead low, small enough to
+    # keep every worker busy until the end
+    chunksize = max(1, min(32, games // (workers * 8)))
+
+    start = perf_counter()
+    done = 0
+    batch: List[MatchRow] = []
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for match in executor.map(play, jobs, chunksize=chunksize):
+            batch.append(match)
+            done += 1
+            if len(batch) >= 200:
+                store.add(batch)
+                batch = []
+                print("{}/{} matches, {:.1f} matches/s".format(done, games, done / (perf_counter() - start)))
+    store.add(batch)
+    ratings = store.update_ratings()
+    store.close()
+    print("{} matches in {:.1f} s on {} workers".format(games, perf_counter() - start, workers))
+    return ratings
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a Diamonds tournament across CPU cores")
+    parser.add_argument(
+        "--bots",
+        help="Comma separated controllers to draw lineups from. Valid options are: {}".format(
+            ", ".join(CONTROLLERS)
+        ),
+        default="MyBot,Points,Chase,Random,Stay",
+        action="store",
+    )
+    parser.add_argument("--games", default=100, type=int, action="store")
+    parser.add_argument("--per-match", help="Bots in every match", default=4, type=int, action="store")
+    parser.add_argument("--seed", default=0, type=int, action="store")
+    parser.add_argument("--workers", help="Default: number of CPUs", type=int, action="store")
+    parser.add_argument("--db", help="SQLite results file", default="tournament.sqlite", action="store")
+    parser.add_argument("--seconds", help="Length of a bot session", default=60, type=int, action="store")
+    parser.add_argument("--record", help="Record every match to this directory", action="store")
+    args = parser.parse_args()
+
+    pool = args.bots.split(",")
+    for controller in pool:
+        if controller not in CONTROLLERS:
+            parser.error("Invalid logic controller: {}".format(controller))
+
+    ratings = run_tournament(
+        pool,
+        args.games,
+        args.per_match,
+        args.seed,
+        args.workers,
+        args.db,
+        BoardConfig(session_seconds=args.seconds),
+        args.record,
+    )
+    print("{:<10} {:>8} {:>7} {:>10}".format("Controller", "Elo", "Games", "Mean score"))
+    for controller, rating, games, mean_score in ratings:
+        print("{:<10} {:>8.1f} {:>7} {:>10.2f}".format(controller, rating, games, mean_score))
+
+
+if __name__ == "__main__":
+    main()
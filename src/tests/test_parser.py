@@ -0,0 +1,200 @@
+import copy
+
+import pytest
+from dacite import from_dict
+from dacite.exceptions import MissingValueError, WrongTypeError
+
+from benchmarks.payloads import board_payload, large_payloads
+from decode import decode
+from game.models import Base, Board, Bot, Position
+from game.parser import parse_board, parse_bot
+
+
+def reference_board(payload: dict) -> Board:
+    return from_dict(Board, decode(payload))
+
+
+def reference_bot(payload: dict) -> Bot:
+    return from_dict(Bot, decode(payload))
+
+
+def edited(edit) -> dict:
+    payload = board_payload(seed=1)
+    edit(payload)
+    return payload
+
+
+def objects_of_type(payload: dict, object_type: str) -> list:
+    return [game_object for game_object in payload["gameObjects"] if game_object["type"] == object_type]
+
+
+def drop_properties(payload: dict) -> None:
+    for game_object in payload["gameObjects"]:
+        del game_object["properties"]
+
+
+def drop_bot_base(payload: dict) -> None:
+    for bot in objects_of_type(payload, "BotGameObject"):
+        del bot["properties"]["base"]
+
+
+def drop_config(payload: dict) -> None:
+    for feature in payload["features"]:
+        del feature["config"]
+
+
+def null_properties(payload: dict) -> None:
+    for game_object in payload["gameObjects"]:
+        game_object["properties"] = None
+
+
+def null_bot_fields(payload: dict) -> None:
+    for bot in objects_of_type(payload, "BotGameObject"):
+        bot["properties"].update(base=None, millisecondsLeft=None, canTackle=None, name=None)
+
+
+def null_config(payload: dict) -> None:
+    for feature in payload["features"]:
+        feature["config"] = None
+
+
+def null_points(payload: dict) -> None:
+    for diamond in objects_of_type(payload, "DiamondGameObject"):
+        diamond["properties"]["points"] = None
+
+
+def extra_keys(payload: dict) -> None:
+    payload["extra"] = {"nested": [1, 2]}
+    for feature in payload["features"]:
+        feature["extraFeatureKey"] = True
+    for game_object in payload["gameObjects"]:
+        game_object["unknown"] = "value"
+        game_object["position"]["z"] = 0
+        if game_object["properties"] is not None:
+            game_object["properties"]["somethingNew"] = 1
+    for bot in objects_of_type(payload, "BotGameObject"):
+        bot["properties"]["base"]["z"] = 0
+
+
+def snake_case_keys(payload: dict) -> None:
+    payload["minimum_delay_between_moves"] = payload.pop("minimumDelayBetweenMoves")
+    payload["game_objects"] = payload.pop("gameObjects")
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_matches_dacite_on_sample_boards(seed):
+    payload = board_payload(seed=seed, diamonds=10 + seed, bots=1 + seed % 6, teleporters=seed % 3)
+    assert parse_board(payload) == reference_board(payload)
+
+
+def test_matches_dacite_on_large_boards():
+    for payload in large_payloads()[:2]:
+        assert parse_board(payload) == reference_board(payload)
+
+
+@pytest.mark.parametrize(
+    "edit",
+    [
+        drop_properties,
+        drop_bot_base,
+        drop_config,
+        null_properties,
+        null_bot_fields,
+        null_config,
+        null_points,
+        lambda payload: payload.update(gameObjects=None),
+        extra_keys,
+        snake_case_keys,
+    ],
+    ids=[
+        "missing properties",
+        "missing bot base",
+        "missing feature config",
+        "null properties",
+        "null bot fields",
+        "null feature config",
+        "null diamond points",
+        "null game objects",
+        "unknown keys",
+        "snake case keys",
+    ],
+)
+def test_matches_dacite_on_edited_boards(edit):
+    payload = edited(edit)
+    assert parse_board(payload) == reference_board(payload)
+
+
+def test_builds_nested_models():
+    board = parse_board(board_payload(seed=2))
+    bot = board.bots[0]
+    assert type(bot.position) is Position
+    assert type(bot.properties.base) is Base
+    assert bot.properties.base == reference_board(board_payload(seed=2)).bots[0].properties.base
+    assert board.features[0].config.generation_ratio == 0.1
+
+
+@pytest.mark.parametrize(
+    "edit",
+    [
+        lambda payload: payload.pop("width"),
+        lambda payload: payload.pop("id"),
+        lambda payload: payload.pop("features"),
+        lambda payload: payload["gameObjects"][0].pop("id"),
+        lambda payload: payload["gameObjects"][0].pop("position"),
+        lambda payload: payload["gameObjects"][3]["position"].pop("x"),
+        lambda payload: payload["gameObjects"][3]["position"].pop("y"),
+        lambda payload: payload["features"][0].pop("name"),
+        lambda payload: objects_of_type(payload, "BotGameObject")[0]["properties"]["base"].pop("x"),
+    ],
+    ids=[
+        "width",
+        "id",
+        "features",
+        "object id",
+        "object position",
+        "position x",
+        "position y",
+        "feature name",
+        "bot base x",
+    ],
+)
+def test_missing_required_field_raises_like_dacite(edit):
+    payload = edited(edit)
+    with pytest.raises(MissingValueError) as expected:
+        reference_board(copy.deepcopy(payload))
+    with pytest.raises(MissingValueError) as raised:
+        parse_board(payload)
+    assert raised.value.field_path == expected.value.field_path
+    assert str(raised.value) == str(expected.value)
+
+
+def test_parses_bots_like_dacite():
+    payload = {"name": "bot1", "email": "bot1@example.com", "id": "token", "team": "etimo"}
+    assert parse_bot(payload) == reference_bot(payload)
+    del payload["email"]
+    with pytest.raises(MissingValueError) as expected:
+        reference_bot(dict(payload))
+    with pytest.raises(MissingValueError) as raised:
+        parse_bot(payload)
+    assert str(raised.value) == str(expected.value)
+
+
+@pytest.mark.parametrize(
+    "edit",
+    [
+        lambda payload: payload.update(width=None),
+        lambda payload: payload.update(features=None),
+        lambda payload: payload["gameObjects"][0].update(position=None),
+        lambda payload: payload["gameObjects"][3]["position"].update(x=None),
+        lambda payload: payload["features"][0].update(name=None),
+    ],
+    ids=["width", "features", "object position", "position x", "feature name"],
+)
+def test_null_required_field_raises_like_dacite(edit):
+    payload = edited(edit)
+    with pytest.raises(WrongTypeError) as expected:
+        reference_board(copy.deepcopy(payload))
+    with pytest.raises(WrongTypeError) as raised:
+        parse_board(payload)
+    assert raised.value.field_path == expected.value.field_path
+    assert str(raised.value) == str(expected.value)
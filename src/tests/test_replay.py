@@ -0,0 +1,61 @@
+import os
+from typing import List
+
+import pytest
+
+from game.models import Board
+from game.recording import GameRecorder
+from game.replay import Replay
+from server.engine import BoardConfig
+from simulator.match import Match
+
+
+class KeepingRecorder(GameRecorder):
+    # Keeps every board it records, to compare the replay with
+    def __init__(self, path: str):
+        super().__init__(path)
+        self.boards: List[Board] = []
+
+    def record(self, board: Board) -> None:
+        self.boards.append(board)
+        super().record(board)
+
+
+def play(path: str, seed: int, seconds: int = 30, teleporters: int = 1) -> List[Board]:
+    config = BoardConfig(session_seconds=seconds, teleporter_pairs=teleporters)
+    with KeepingRecorder(path) as recorder:
+        Match(["MyBot", "Points", "Chase", "Random"], config, seed=seed, recorder=recorder).run()
+    return recorder.boards
+
+
+@pytest.mark.parametrize("seed", [3, 7])
+def test_replayed_boards_equal_recorded_boards(tmp_path, seed):
+    path = os.path.join(tmp_path, "match.rec")
+    recorded = play(path, seed, teleporters=2)
+    with Replay(path) as replay:
+        assert len(replay) == len(recorded)
+        for number, board in enumerate(recorded):
+            assert replay.board(number) == board, "tick {}".format(number)
+
+
+def test_random_access_equals_recorded_boards(tmp_path):
+    path = os.path.join(tmp_path, "match.rec")
+    recorded = play(path, seed=3)
+    with Replay(path, checkpoint_every=16) as replay:
+        for number in reversed(range(len(recorded))):
+            assert replay.board(number) == recorded[number], "tick {}".format(number)
+        for number in (0, len(recorded) - 1, len(recorded) // 2, 17, 16, 15):
+            assert replay.board(number) == recorded[number], "tick {}".format(number)
+
+
+def test_moves_are_recorded(tmp_path):
+    path = os.path.join(tmp_path, "match.rec")
+    recorded = play(path, seed=1, seconds=5)
+    with Replay(path) as replay:
+        played = replay.played_by()
+        bots = {bot.id for bot in recorded[0].bots}
+        assert set(played) <= bots
+        assert sum(played.values()) > 0
+        for tick in replay:
+            for move in tick.moves.values():
+                assert abs(move[0]) + abs(move[1]) == 1
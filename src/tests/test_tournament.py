@@ -0,0 +1,23 @@
+import os
+import sqlite3
+
+from server.engine import BoardConfig
+from simulator.tournament import run_tournament
+
+
+def test_short_tournament_stores_every_match(tmp_path):
+    database = os.path.join(tmp_path, "tournament.sqlite")
+    ratings = run_tournament(
+        ["MyBot", "Points", "Random"],
+        games=2,
+        bots_per_match=3,
+        workers=1,
+        database=database,
+        config=BoardConfig(session_seconds=2),
+    )
+    assert {rating[0] for rating in ratings} <= {"MyBot", "Points", "Random"}
+    with sqlite3.connect(database) as connection:
+        (matches,) = connection.execute("SELECT COUNT(*) FROM matches").fetchone()
+        (results,) = connection.execute("SELECT COUNT(*) FROM results").fetchone()
+    assert matches == 2
+    assert results == 6